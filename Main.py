@@ -1,66 +1,88 @@
 
 
+import contextlib
+import io
+import os
 import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 try:
     import graphviz
     GRAPHVIZ_AVAILABLE = True
 except ImportError:
     GRAPHVIZ_AVAILABLE = False
-    print("⚠️  Graphviz no disponible. Las visualizaciones se omitirán.")
 
 # Importar módulos del proyecto
 from regex_parser import ShuntingYardRegex
 from ast_builder import RegexASTBuilder
 from automata_constructors import ThompsonNFAConstructor, SubsetConstructor, DFAMinimizer
+from models import LiteralAltAutomaton
 
+# Rasterizar los diagramas (un proceso de Graphviz por gráfico) solo si se pide;
+# por defecto se guarda únicamente el código DOT (TEORIA_RENDER=1 para generar PNG)
+RENDERIZAR_IMAGENES = os.environ.get("TEORIA_RENDER", "0") == "1"
 
-def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', archivo_cadenas='cadenas.txt'):
-    """
-    Procesa expresiones regulares con cadenas específicas usando el flujo completo:
-    Regex → AFN (Thompson) → AFD (Subconjuntos) → AFD Minimizado
+# Procesar las expresiones en un pool de procesos solo si se pide (TEORIA_PARALELO=1):
+# para los archivos pequeños de siempre, arrancar los procesos cuesta más que el trabajo
+PROCESAR_EN_PARALELO = os.environ.get("TEORIA_PARALELO", "0") == "1"
+
+
+# Plantillas del recuadro de simulaciones comparativas
+RESULTADO_SI = "sí    ✅"
+RESULTADO_NO = "no    ❌"
+
+PLANTILLA_CONSISTENTE = (
+    "   │ ✅ TODOS CONSISTENTES              │\n"
+    "   │ w ∈ L(r): {pertenece:<22} │"
+)
+
+PLANTILLA_INCONSISTENTE = (
+    "   │ ❌ ERROR: INCONSISTENCIA           │\n"
+    "   │ AFN≠AFD: {afn_afd}\n"
+    "   │ AFD≠MIN: {afd_min}"
+)
+
+PLANTILLA_SIMULACION = (
+    "\\n   🧪 SIMULACIONES COMPARATIVAS:\n"
+    "   ┌─────────────────────────────────────┐\n"
+    "   │ Cadena: {cadena:<27}│\n"
+    "   │ ─────────────────────────────────── │\n"
+    "   │ AFN:        {afn}               │\n"
+    "   │ AFD:        {afd}               │\n"
+    "   │ AFD Min:    {afd_min}               │\n"
+    "   │ ─────────────────────────────────── │\n"
+    "{consistencia}\n"
+    "   │ ─────────────────────────────────── │\n"
+    "   │ Estados AFN: {estados_afn:<19} │\n"
+    "   │ Estados AFD: {estados_afd:<19} │\n"
+    "   │ Estados Min: {estados_min:<19} │\n"
+    "   │ Reducción:   {reduccion:<18} │\n"
+    "   └─────────────────────────────────────┘"
+)
+
+PLANTILLA_LITERAL = (
+    "\n   🧪 SIMULACIÓN (UNIÓN DE LITERALES):\n"
+    "   ┌─────────────────────────────────────┐\n"
+    "   │ Cadena: {cadena:<27}│\n"
+    "   │ Literales: {literales:<24} │\n"
+    "   │ w ∈ L(r): {pertenece:<22} │\n"
+    "   └─────────────────────────────────────┘"
+)
+
+
+def procesar_expresion(tarea):
     """
+    Procesa una expresión con sus cadenas: Regex → AST → AFN → AFD → AFD Minimizado.
+    Se ejecuta en un proceso del pool, por lo que captura su salida y devuelve el
+    código DOT de los gráficos para que el proceso principal los renderice.
     
-    # Leer expresiones regulares
-    try:
-        with open(archivo_expresiones, 'r', encoding='utf-8') as f:
-            expresiones = [line.strip() for line in f if line.strip()]
-        print(f" Archivo '{archivo_expresiones}' cargado exitosamente")
-        print(f" Se encontraron {len(expresiones)} expresiones")
-    except FileNotFoundError:
-        print(f" Error: Archivo '{archivo_expresiones}' no encontrado")
-        return
-    except Exception as e:
-        print(f" Error leyendo archivo de expresiones: {e}")
-        return
-    
-    # Leer cadenas de prueba
-    try:
-        with open(archivo_cadenas, 'r', encoding='utf-8') as f:
-            cadenas = [line.strip() for line in f]
-        print(f" Archivo '{archivo_cadenas}' cargado exitosamente")
-        print(f" Se encontraron {len(cadenas)} cadenas")
-    except FileNotFoundError:
-        print(f" Error: Archivo '{archivo_cadenas}' no encontrado")
-        # Crear archivo con cadenas de ejemplo
-        cadenas_ejemplo = ["", "a", "ab", "abb"]
-        with open(archivo_cadenas, 'w', encoding='utf-8') as f:
-            for cadena in cadenas_ejemplo:
-                f.write(cadena + '\\n')
-        print(f" Se creó '{archivo_cadenas}' con cadenas de ejemplo")
-        cadenas = cadenas_ejemplo
-    except Exception as e:
-        print(f" Error leyendo archivo de cadenas: {e}")
-        return
-    
-    # Verificar que hay suficientes cadenas
-    if len(cadenas) < len(expresiones):
-        print(f" Advertencia: Solo hay {len(cadenas)} cadenas para {len(expresiones)} expresiones")
-        # Completar con cadena vacía
-        while len(cadenas) < len(expresiones):
-            cadenas.append("")
-    
-    print(" ALGORITMO COMPLETO - AFN → AFD → AFD MINIMIZADO")
-    print("=" * 80)
+    Retorna: (salida, exitosa, graficos) con graficos = [(dot, nombre_archivo), ...]
+    """
+    i, regex, cadenas_w = tarea
+    salida = io.StringIO()
+    graficos = []
+    exitosa = False
     
     # Inicializar todos los componentes
     converter = ShuntingYardRegex()
@@ -68,11 +90,11 @@ def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', arch
     thompson_constructor = ThompsonNFAConstructor()
     subset_constructor = SubsetConstructor()
     dfa_minimizer = DFAMinimizer()
-    exitosas = 0
     
-    for i, (regex, cadena_w) in enumerate(zip(expresiones, cadenas), 1):
+    with contextlib.redirect_stdout(salida):
         print(f"\\n EXPRESIÓN {i}: '{regex}'")
-        print(f" CADENA W: '{cadena_w}'")
+        for cadena_w in cadenas_w:
+            print(f" CADENA W: '{cadena_w}'")
         try:
             # Paso 1: Convertir a postfijo usando Shunting Yard
             postfix = converter.infix_to_postfix(regex, verbose=False)
@@ -84,8 +106,22 @@ def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', arch
             
             # Generar visualización gráfica del AST
             if GRAPHVIZ_AVAILABLE:
-                filename_ast = f"ast_expresion_{i}"
-                ast_builder.visualize_ast(ast_root, filename=filename_ast)
+                graficos.append((ast_builder.ast_to_dot(ast_root), f"ast_expresion_{i}"))
+            
+            # Uniones de literales (ej. abc|def): no requieren autómatas
+            clase, literales = ast_builder.classify(ast_root)
+            if clase == 'literal_alt':
+                print(f"\n    UNIÓN DE LITERALES: se omite la construcción de autómatas")
+                automata = LiteralAltAutomaton(literales)
+                for cadena_w in cadenas_w:
+                    print(PLANTILLA_LITERAL.format(
+                        cadena=f"'{cadena_w}'",
+                        literales=len(automata.literals),
+                        pertenece='VERDADERO' if automata.simulate(cadena_w) else 'FALSO'))
+                return salida.getvalue(), True, graficos
+            
+            # Factorizar prefijos/sufijos comunes de las uniones antes de Thompson
+            ast_root = ast_builder.factor_prefixes(ast_root)
             
             # Paso 3: Generar AFN usando Thompson
             print(f"\\n    GENERANDO AFN CON THOMPSON...")
@@ -100,8 +136,7 @@ def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', arch
             
             # Generar visualización del AFN
             if GRAPHVIZ_AVAILABLE:
-                filename_nfa = f"thompson_nfa_{i}"
-                thompson_constructor.visualize_nfa(nfa, filename=filename_nfa)
+                graficos.append((thompson_constructor.nfa_to_dot(nfa), f"thompson_nfa_{i}"))
             
             # Paso 4: Generar AFD usando construcción por subconjuntos
             print(f"\\n    GENERANDO AFD CON CONSTRUCCIÓN POR SUBCONJUNTOS...")
@@ -109,75 +144,169 @@ def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', arch
             
             # Generar visualización del AFD
             if GRAPHVIZ_AVAILABLE:
-                filename_dfa = f"subset_dfa_{i}"
-                subset_constructor.visualize_dfa(dfa, filename=filename_dfa)
+                graficos.append((subset_constructor.dfa_to_dot(dfa), f"subset_dfa_{i}"))
             
-            # Paso 5: Minimizar AFD
+            # Paso 5: Minimizar AFD (innecesario si el AFN es co-determinista)
             print(f"\\n    MINIMIZANDO AFD...")
-            minimized_dfa = dfa_minimizer.minimize_dfa(dfa)
+            if nfa.is_simple():
+                print(f"    ✅ AFN co-determinista: el AFD por subconjuntos ya es mínimo")
+                minimized_dfa = dfa
+            else:
+                minimized_dfa = dfa_minimizer.minimize_dfa(dfa)
             
             # Generar visualización del AFD minimizado
             if GRAPHVIZ_AVAILABLE:
-                filename_min_dfa = f"minimized_dfa_{i}"
-                dfa_minimizer.visualize_minimized_dfa(minimized_dfa, filename=filename_min_dfa)
-            
-            # SIMULACIONES COMPARATIVAS
-            print(f"\\n   🧪 SIMULACIONES COMPARATIVAS:")
-            print(f"   ┌─────────────────────────────────────┐")
-            print(f"   │ Cadena: '{cadena_w}'" + " " * max(0, 25 - len(cadena_w)) + "│")
-            print(f"   │ ─────────────────────────────────── │")
-            
-            # SIMULACIÓN EN AFN
-            resultado_nfa = nfa.simulate(cadena_w)
-            if resultado_nfa:
-                print(f"   │ AFN:        sí    ✅               │")
-            else:
-                print(f"   │ AFN:        no    ❌               │")
-            
-            # SIMULACIÓN EN AFD
-            resultado_dfa = dfa.simulate(cadena_w)
-            if resultado_dfa:
-                print(f"   │ AFD:        sí    ✅               │")
-            else:
-                print(f"   │ AFD:        no    ❌               │")
-            
-            # SIMULACIÓN EN AFD MINIMIZADO
-            resultado_min_dfa = minimized_dfa.simulate(cadena_w)
-            if resultado_min_dfa:
-                print(f"   │ AFD Min:    sí    ✅               │")
-            else:
-                print(f"   │ AFD Min:    no    ❌               │")
-            
-            print(f"   │ ─────────────────────────────────── │")
+                graficos.append((dfa_minimizer.minimized_dfa_to_dot(minimized_dfa), f"minimized_dfa_{i}"))
             
-            # Verificar consistencia entre todos los autómatas
-            all_consistent = (resultado_nfa == resultado_dfa == resultado_min_dfa)
-            if all_consistent:
-                print(f"   │ ✅ TODOS CONSISTENTES              │")
-                print(f"   │ w ∈ L(r): {'VERDADERO' if resultado_nfa else 'FALSO':<22} │")
-            else:
-                print(f"   │ ❌ ERROR: INCONSISTENCIA           │")
-                print(f"   │ AFN≠AFD: {resultado_nfa != resultado_dfa}")
-                print(f"   │ AFD≠MIN: {resultado_dfa != resultado_min_dfa}")
-            
-            # Mostrar estadísticas de reducción
-            print(f"   │ ─────────────────────────────────── │")
-            print(f"   │ Estados AFN: {len(nfa.states):<19} │")
-            print(f"   │ Estados AFD: {len(dfa.states):<19} │")
-            print(f"   │ Estados Min: {len(minimized_dfa.states):<19} │")
+            # SIMULACIONES COMPARATIVAS (los AFD validan todas las cadenas en lote)
+            resultados_nfa = [nfa.simulate(cadena_w) for cadena_w in cadenas_w]
+            resultados_dfa = dfa.simulate_batch(cadenas_w)
+            resultados_min_dfa = minimized_dfa.simulate_batch(cadenas_w)
             reduction_pct = ((len(dfa.states) - len(minimized_dfa.states)) / len(dfa.states) * 100) if len(dfa.states) > 0 else 0
-            print(f"   │ Reducción:   {reduction_pct:.1f}%{' ' * (18 - len(f'{reduction_pct:.1f}%'))} │")
-            print(f"   └─────────────────────────────────────┘")
             
-            exitosas += 1
+            for cadena_w, resultado_nfa, resultado_dfa, resultado_min_dfa in zip(
+                    cadenas_w, resultados_nfa, resultados_dfa, resultados_min_dfa):
+                # Verificar consistencia entre todos los autómatas
+                all_consistent = (resultado_nfa == resultado_dfa == resultado_min_dfa)
+                if all_consistent:
+                    consistencia = PLANTILLA_CONSISTENTE.format(
+                        pertenece='VERDADERO' if resultado_nfa else 'FALSO')
+                else:
+                    consistencia = PLANTILLA_INCONSISTENTE.format(
+                        afn_afd=resultado_nfa != resultado_dfa,
+                        afd_min=resultado_dfa != resultado_min_dfa)
+                
+                # Mostrar resultados y estadísticas de reducción en una sola escritura
+                print(PLANTILLA_SIMULACION.format(
+                    cadena=f"'{cadena_w}'",
+                    afn=RESULTADO_SI if resultado_nfa else RESULTADO_NO,
+                    afd=RESULTADO_SI if resultado_dfa else RESULTADO_NO,
+                    afd_min=RESULTADO_SI if resultado_min_dfa else RESULTADO_NO,
+                    consistencia=consistencia,
+                    estados_afn=len(nfa.states),
+                    estados_afd=len(dfa.states),
+                    estados_min=len(minimized_dfa.states),
+                    reduccion=f"{reduction_pct:.1f}%"))
+            
+            exitosa = True
             
         except Exception as e:
             print(f"    Error: {e}")
-        print("   " + "─" * 70)
+    
+    return salida.getvalue(), exitosa, graficos
+
+
+def renderizar_dot(dot, filename, format="png", render_images=False):
+    """Guardar (o renderizar con Graphviz) el código DOT generado por un proceso del pool"""
+    try:
+        if render_images:
+            graphviz.Source(dot).render(filename, format=format, cleanup=True)
+            print(f"   🎨 Visualización generada en: {filename}.{format}")
+        else:
+            graphviz.Source(dot).save(f"{filename}.dot")
+            print(f"   🎨 Código DOT guardado en: {filename}.dot")
+    except Exception as e:
+        print(f"    Error al generar visualización: {e}")
+
+
+def resultados_en_orden(executor, tareas, ventana):
+    """
+    Enviar las tareas al pool con a lo sumo `ventana` pendientes a la vez y devolver
+    sus resultados en orden, sin consumir todas las tareas ni acumular todas las salidas
+    """
+    pendientes = deque()
+    for tarea in tareas:
+        pendientes.append(executor.submit(procesar_expresion, tarea))
+        if len(pendientes) >= ventana:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+def procesar_expresiones_con_cadenas(archivo_expresiones='expresiones.txt', archivo_cadenas='cadenas.txt', paralelo=PROCESAR_EN_PARALELO, max_workers=None, render_images=RENDERIZAR_IMAGENES):
+    """
+    Procesa expresiones regulares con cadenas específicas usando el flujo completo:
+    Regex → AFN (Thompson) → AFD (Subconjuntos) → AFD Minimizado
+    
+    Las expresiones son independientes entre sí: con paralelo=True (o TEORIA_PARALELO=1)
+    se procesan en un ProcessPoolExecutor (max_workers=None usa todos los núcleos), con
+    una ventana acotada de tareas en curso, y los resultados se muestran en orden. Los gráficos se escriben desde el proceso principal: solo el
+    código DOT, salvo que render_images=True (o TEORIA_RENDER=1) pida las imágenes.
+    """
+    
+    with contextlib.ExitStack() as archivos:
+        # Abrir expresiones regulares (se leen línea por línea)
+        try:
+            f_expresiones = archivos.enter_context(open(archivo_expresiones, 'r', encoding='utf-8'))
+            print(f" Archivo '{archivo_expresiones}' cargado exitosamente")
+        except FileNotFoundError:
+            print(f" Error: Archivo '{archivo_expresiones}' no encontrado")
+            return
+        except Exception as e:
+            print(f" Error leyendo archivo de expresiones: {e}")
+            return
+        
+        # Abrir cadenas de prueba
+        try:
+            f_cadenas = archivos.enter_context(open(archivo_cadenas, 'r', encoding='utf-8'))
+            print(f" Archivo '{archivo_cadenas}' cargado exitosamente")
+        except FileNotFoundError:
+            print(f" Error: Archivo '{archivo_cadenas}' no encontrado")
+            # Crear archivo con cadenas de ejemplo
+            cadenas_ejemplo = ["", "a", "ab", "abb"]
+            with open(archivo_cadenas, 'w', encoding='utf-8') as f:
+                for cadena in cadenas_ejemplo:
+                    f.write(cadena + '\\n')
+            print(f" Se creó '{archivo_cadenas}' con cadenas de ejemplo")
+            f_cadenas = cadenas_ejemplo
+        except Exception as e:
+            print(f" Error leyendo archivo de cadenas: {e}")
+            return
+        
+        expresiones = (line.strip() for line in f_expresiones if line.strip())
+        # Cada línea trae las cadenas de su expresión separadas por espacios (vacía = ε)
+        cadenas = (line.split() or [""] for line in f_cadenas)
+        
+        print(" ALGORITMO COMPLETO - AFN → AFD → AFD MINIMIZADO")
+        print("=" * 80)
+        
+        exitosas = 0
+        total = 0
+        faltantes = 0
+        
+        def tareas():
+            nonlocal faltantes
+            for i, regex in enumerate(expresiones, 1):
+                # Completar con cadena vacía si se agotan las cadenas
+                cadenas_w = next(cadenas, None)
+                if cadenas_w is None:
+                    cadenas_w = [""]
+                    faltantes += 1
+                yield i, regex, cadenas_w
+        
+        if paralelo:
+            workers = max_workers or os.cpu_count() or 1
+            executor = archivos.enter_context(ProcessPoolExecutor(max_workers=workers))
+            resultados = resultados_en_orden(executor, tareas(), 2 * workers)
+        else:
+            resultados = map(procesar_expresion, tareas())
+        
+        for salida, exitosa, graficos in resultados:
+            total += 1
+            sys.stdout.write(salida)
+            for dot, filename in graficos:
+                renderizar_dot(dot, filename, render_images=render_images)
+            if exitosa:
+                exitosas += 1
+            print("   " + "─" * 70)
+    
+    # Verificar que hubo suficientes cadenas
+    if faltantes:
+        print(f" Advertencia: Solo hay {total - faltantes} cadenas para {total} expresiones")
     
     # Resumen final
-    print(f"\\n RESUMEN: {exitosas}/{len(expresiones)} procesadas exitosamente")
-    if exitosas == len(expresiones):
+    print(f"\\n RESUMEN: {exitosas}/{total} procesadas exitosamente")
+    if exitosas == total:
         print("    ¡Todas las expresiones fueron procesadas correctamente!")
     
     # Información de los algoritmos implementados
@@ -220,6 +349,9 @@ def main():
     print("  Flujo completo: Regex → AFN → AFD → AFD Minimizado")
     print("=" * 80)
     
+    if not GRAPHVIZ_AVAILABLE:
+        print("⚠️  Graphviz no disponible. Las visualizaciones se omitirán.")
+    
     # Procesar expresiones con cadenas específicas desde archivos
     print("\\n PROCESANDO EXPRESIONES CON CADENAS ESPECÍFICAS")
     print("="*80)
@@ -3,12 +3,39 @@ Constructor de Árboles Sintácticos Abstractos (AST) para expresiones regulares
 Maneja la conversión de expresiones postfijas a AST y su visualización.
 """
 
+from array import array
+from enum import IntEnum
+
 try:
     import graphviz
     GRAPHVIZ_AVAILABLE = True
 except ImportError:
     GRAPHVIZ_AVAILABLE = False
 
+# Operadores del AST por aridad
+_BINARY_OPS = frozenset("|.")
+_UNARY_OPS = frozenset("*?")
+
+# Profundidad máxima de factorización anidada de una unión; más allá se deja sin factorizar
+_MAX_FACTOR_DEPTH = 100
+
+
+class SymbolKind(IntEnum):
+    """Tipo de nodo del AST, fijado al construirlo para no reinspeccionar su texto"""
+    OPERATOR = 0
+    CHAR = 1     # Carácter simple
+    LITERAL = 2  # Literal escapado (Lx)
+    EPSILON = 3  # Cadena vacía ε
+    
+    @staticmethod
+    def of_leaf(value):
+        """Clasificar el valor de una hoja"""
+        if value == 'ε':
+            return SymbolKind.EPSILON
+        if len(value) > 1 and value.startswith('L'):
+            return SymbolKind.LITERAL
+        return SymbolKind.CHAR
+
 
 class ASTNode:
     """Nodo del Árbol Sintáctico Abstracto"""
@@ -25,15 +52,88 @@ class ASTNode:
         return f"ASTNode({self.value})"
 
 
+class CompactAST:
+    """
+    AST en estructura de arreglos (SoA): cada nodo es un índice en arreglos paralelos.
+    Los nodos se agregan en orden postfijo, por lo que los hijos siempre tienen un
+    índice menor que su padre y la raíz es el último nodo. -1 indica "sin hijo".
+    """
+    def __init__(self, base_id=0):
+        self.values = []
+        self.left = array('i')
+        self.right = array('i')
+        self.kinds = array('b')  # SymbolKind de cada nodo
+        self.base_id = base_id  # Desplazamiento para ids únicos en el grafo
+    
+    def add_node(self, value, left=-1, right=-1, kind=None):
+        """Agregar un nodo y devolver su índice (kind se deduce si no se indica)"""
+        if kind is None:
+            kind = SymbolKind.of_leaf(value) if left < 0 and right < 0 else SymbolKind.OPERATOR
+        self.values.append(value)
+        self.left.append(left)
+        self.right.append(right)
+        self.kinds.append(kind)
+        return len(self.values) - 1
+    
+    @property
+    def root(self):
+        return len(self.values) - 1
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def node_id(self, index):
+        return self.base_id + index + 1
+    
+    def is_leaf(self, index):
+        return self.left[index] < 0 and self.right[index] < 0
+    
+    def to_node(self):
+        """Construir una vista con ASTNode (usada por la visualización)"""
+        nodes = []
+        for index, value in enumerate(self.values):
+            left, right = self.left[index], self.right[index]
+            node = ASTNode(value,
+                           nodes[left] if left >= 0 else None,
+                           nodes[right] if right >= 0 else None)
+            node.id = self.node_id(index)
+            nodes.append(node)
+        return nodes[-1] if nodes else None
+    
+    @classmethod
+    def from_node(cls, root):
+        """Convertir un árbol de ASTNode a CompactAST (recorrido postorden iterativo)"""
+        ast = cls()
+        indices = {}
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                indices[id(node)] = ast.add_node(
+                    node.value,
+                    indices[id(node.left)] if node.left else -1,
+                    indices[id(node.right)] if node.right else -1)
+                continue
+            stack.append((node, True))
+            if node.right:
+                stack.append((node.right, False))
+            if node.left:
+                stack.append((node.left, False))
+        return ast
+
+
 class RegexASTBuilder:
     """Constructor de AST para expresiones regulares desde notación postfija"""
     
     def __init__(self):
         self.node_counter = 0
+        self._keys = {}  # id(nodo) → (nodo, clave) durante factor_prefixes
+        self._shapes = {}  # (valor, clave izq., clave der.) → clave entera
     
     def build_ast(self, postfix):
-        """Construye AST desde expresión postfija"""
-        stack = []
+        """Construye AST (CompactAST) desde expresión postfija"""
+        ast = CompactAST(self.node_counter)
+        stack = []  # Índices de nodos en el AST
         
         # Filtrar espacios de la expresión postfija
         clean_postfix = ''.join(char for char in postfix if char != ' ')
@@ -47,62 +147,251 @@ class RegexASTBuilder:
             if char == 'L' and i + 1 < len(clean_postfix):
                 # Literal escapado
                 literal = char + clean_postfix[i + 1]
-                node = ASTNode(literal)
-                node.id = self.node_counter
-                stack.append(node)
+                stack.append(ast.add_node(literal, kind=SymbolKind.LITERAL))
                 i += 2
                 continue
             
-            if char in ['|', '.']:  # Operadores binarios
+            if char in _BINARY_OPS:  # Operadores binarios
                 if len(stack) < 2:
                     raise ValueError(f"Error: operador binario '{char}' requiere 2 operandos (stack: {len(stack)})")
                 
                 right = stack.pop()
                 left = stack.pop()
-                node = ASTNode(char, left, right)
-                node.id = self.node_counter
-                stack.append(node)
+                stack.append(ast.add_node(char, left, right, SymbolKind.OPERATOR))
                 
-            elif char in ['*', '?']:  # Operadores unarios
+            elif char in _UNARY_OPS:  # Operadores unarios
                 if len(stack) < 1:
                     raise ValueError(f"Error: operador unario '{char}' requiere 1 operando (stack: {len(stack)})")
                 
                 child = stack.pop()
-                node = ASTNode(char, child)
-                node.id = self.node_counter
-                stack.append(node)
+                stack.append(ast.add_node(char, child, kind=SymbolKind.OPERATOR))
                 
             else:  # Operandos (letras, números, ε, etc.)
-                node = ASTNode(char)
-                node.id = self.node_counter
-                stack.append(node)
+                kind = SymbolKind.EPSILON if char == 'ε' else SymbolKind.CHAR
+                stack.append(ast.add_node(char, kind=kind))
             
             i += 1
         
         if len(stack) != 1:
-            raise ValueError(f"Error: expresión postfija malformada - quedan {len(stack)} elementos en el stack: {[n.value for n in stack]}")
+            raise ValueError(f"Error: expresión postfija malformada - quedan {len(stack)} elementos en el stack: {[ast.values[n] for n in stack]}")
         
-        return stack[0]
+        return ast
     
-    def visualize_ast(self, root, filename="regex_ast", format="png"):
-        """Visualiza el AST usando Graphviz"""
-        if not GRAPHVIZ_AVAILABLE:
-            print(" No se puede visualizar: Graphviz no está disponible")
-            return None
+    def classify(self, root):
+        """
+        Clasifica el AST. Devuelve ('literal_alt', cadenas) si la expresión es una
+        unión de cadenas literales (ej. abc|def|ε), o ('general', None) en otro caso.
+        """
+        if isinstance(root, ASTNode):
+            root = CompactAST.from_node(root)
+        if not len(root):
+            return ('general', None)
+        
+        # Los hijos se procesan antes que el padre (orden postfijo). Cada resultado lo
+        # consume solo su padre, así que las listas del hijo izquierdo se extienden en sitio
+        literal = []  # Partes de la cadena literal del nodo, o None
+        alternatives = []  # Lista de cadenas para nodos '|', o None
+        for index, value in enumerate(root.values):
+            left, right = root.left[index], root.right[index]
+            node_literal, node_alts = None, None
+            
+            if root.is_leaf(index):
+                if value == 'ε':
+                    node_literal = []
+                elif value.startswith('L') and len(value) > 1:
+                    node_literal = [value[1:]]
+                else:
+                    node_literal = [value]
+            elif value == '.':
+                if literal[left] is not None and literal[right] is not None:
+                    node_literal = literal[left]
+                    node_literal += literal[right]
+            elif value == '|':
+                left_alts = alternatives[left] or ([''.join(literal[left])] if literal[left] is not None else None)
+                right_alts = alternatives[right] or ([''.join(literal[right])] if literal[right] is not None else None)
+                if left_alts is not None and right_alts is not None:
+                    node_alts = left_alts
+                    node_alts += right_alts
+            
+            literal.append(node_literal)
+            alternatives.append(node_alts)
+        
+        if alternatives[root.root] is not None:
+            return ('literal_alt', alternatives[root.root])
+        if literal[root.root] is not None:
+            return ('literal_alt', [''.join(literal[root.root])])
+        return ('general', None)
+    
+    def factor_prefixes(self, root):
+        """
+        Factoriza prefijos y sufijos comunes en las uniones del AST:
+        ab|ac|ade → a(b|c|de) y car|bar → (c|b)ar. Reduce el tamaño del AFN
+        sin cambiar el lenguaje. Devuelve un CompactAST (el mismo si no hay uniones).
+        """
+        if isinstance(root, CompactAST):
+            if '|' not in root.values:
+                return root
+            root = root.to_node()
+        if root is None:
+            return CompactAST()
+        
+        try:
+            return CompactAST.from_node(self._factor_node(root))
+        finally:
+            self._keys.clear()
+            self._shapes.clear()
+    
+    def _factor_node(self, root):
+        """Factorizar un subárbol con un recorrido post-orden iterativo"""
+        factored = {}  # id(nodo original) → subárbol factorizado
+        stack = [(root, None)]  # (nodo, operandos ya encolados o None)
+        
+        while stack:
+            node, operands = stack.pop()
+            if node.is_leaf():
+                factored[id(node)] = node
+                continue
+            
+            if operands is None:
+                # Cadenas de '.' y '|' se aplanan: sus operandos se factorizan por separado
+                if node.value in ('.', '|'):
+                    operands = self._flatten(node, node.value)
+                else:
+                    operands = [child for child in (node.left, node.right) if child]
+                stack.append((node, operands))
+                stack.extend((operand, None) for operand in operands)
+                continue
+            
+            parts = [factored[id(operand)] for operand in operands]
+            if node.value == '.':
+                result = self._join('.', parts)
+            elif node.value == '|':
+                result = self._factor_alternation([self._flatten(a, '.') for a in parts])
+            elif node.value in _UNARY_OPS:
+                result = ASTNode(node.value, parts[0])
+            else:
+                children = iter(parts)
+                result = ASTNode(node.value,
+                                 next(children) if node.left else None,
+                                 next(children) if node.right else None)
+            factored[id(node)] = result
+        
+        return factored[id(root)]
+    
+    def _factor_alternation(self, sequences, depth=0):
+        """Construir la unión de secuencias de concatenación factorizando prefijos y sufijos"""
+        if depth >= _MAX_FACTOR_DEPTH:
+            return self._join('|', [self._join('.', seq) for seq in sequences])
+        
+        # Eliminar alternativas repetidas (b|b → b)
+        unique = {}
+        for seq in sequences:
+            unique.setdefault(tuple(self._key(f) for f in seq), seq)
+        sequences = list(unique.values())
+        
+        sequences = self._factor_shared(sequences, False, depth)
+        sequences = self._factor_shared(sequences, True, depth)
+        return self._join('|', [self._join('.', seq) for seq in sequences])
+    
+    def _factor_shared(self, sequences, from_end, depth):
+        """Agrupar secuencias por su primer (o último) factor y extraer la parte común"""
+        groups = {}
+        for seq in sequences:
+            key = self._key(seq[-1] if from_end else seq[0]) if seq else None
+            groups.setdefault(key, []).append(seq)
+        
+        result = []
+        for key, group in groups.items():
+            if key is None or len(group) < 2:
+                result.extend(group)
+                continue
+            
+            # Longitud de la parte común a todas las secuencias del grupo
+            shared = 0
+            while all(shared < len(seq) for seq in group):
+                position = -1 - shared if from_end else shared
+                if len({self._key(seq[position]) for seq in group}) != 1:
+                    break
+                shared += 1
+            
+            if from_end:
+                common = group[0][len(group[0]) - shared:]
+                rest = self._factor_alternation([seq[:len(seq) - shared] for seq in group], depth + 1)
+                result.append([rest] + common)
+            else:
+                common = group[0][:shared]
+                rest = self._factor_alternation([seq[shared:] for seq in group], depth + 1)
+                result.append(common + [rest])
+        return result
+    
+    def _flatten(self, node, op):
+        """Operandos de una cadena de operadores asociativos (op) en orden izquierda a derecha"""
+        operands, stack = [], [node]
+        while stack:
+            current = stack.pop()
+            if current.value == op and current.left and current.right:
+                stack.append(current.right)
+                stack.append(current.left)
+            else:
+                operands.append(current)
+        return operands
+    
+    def _join(self, op, operands):
+        """Combinar operandos con un operador binario (asociando a la izquierda)"""
+        if not operands:
+            return ASTNode('ε')
+        result = operands[0]
+        for operand in operands[1:]:
+            result = ASTNode(op, result, operand)
+        return result
+    
+    def _key(self, node):
+        """
+        Clave estructural de un subárbol para comparar factores: un entero compartido
+        por los subárboles iguales, calculado una vez por nodo (post-orden iterativo)
+        """
+        if node is None:
+            return -1
+        keys = self._keys
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in keys:
+                stack.pop()
+                continue
+            pending = [child for child in (current.left, current.right)
+                       if child is not None and id(child) not in keys]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            shape = (current.value,
+                     keys[id(current.left)][1] if current.left else -1,
+                     keys[id(current.right)][1] if current.right else -1)
+            # Se guarda el nodo junto a su clave para que su id no se reutilice
+            keys[id(current)] = (current, self._shapes.setdefault(shape, len(self._shapes)))
+        return keys[id(node)][1]
+    
+    def ast_to_dot(self, root):
+        """Genera el código DOT del AST"""
+        if isinstance(root, CompactAST):
+            root = root.to_node()
         
-        dot = graphviz.Digraph(comment='Regex AST')
-        dot.attr(rankdir='TB')  # Top to Bottom
-        dot.attr('node', shape='circle', style='filled')
+        lines = ['// Regex AST', 'digraph {', '\trankdir=TB', '\tnode [shape=circle style=filled]']
         
-        def add_nodes(node):
-            if node is None:
-                return
+        # Pre-orden con una pila explícita: cada arista se escribe justo antes de su subárbol
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                lines.append(node)
+                continue
             
             # Configurar color según tipo de nodo
-            if node.value in ['|', '.']:
+            if node.value in _BINARY_OPS:
                 color = 'lightblue'
                 shape = 'diamond'
-            elif node.value in ['*', '?']:
+            elif node.value in _UNARY_OPS:
                 color = 'lightgreen'
                 shape = 'square'
             else:
@@ -125,21 +414,37 @@ class RegexASTBuilder:
                 # Para literales escapados, mostrar el carácter sin el prefijo L
                 label = label[1:] if len(label) > 1 else label
             
-            dot.node(str(node.id), label, fillcolor=color, shape=shape)
+            # Escapar comillas y barras para la cadena DOT
+            label = label.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'\t{node.id} [label="{label}" fillcolor={color} shape={shape}]')
             
-            # Agregar aristas
-            if node.left:
-                dot.edge(str(node.id), str(node.left.id), label='L')
-                add_nodes(node.left)
+            # Agregar aristas (apiladas en orden inverso: primero sale la izquierda)
             if node.right:
-                dot.edge(str(node.id), str(node.right.id), label='R')
-                add_nodes(node.right)
+                stack.append(node.right)
+                stack.append(f'\t{node.id} -> {node.right.id} [label=R]')
+            if node.left:
+                stack.append(node.left)
+                stack.append(f'\t{node.id} -> {node.left.id} [label=L]')
+        
+        lines.append('}')
+        return '\n'.join(lines)
+    
+    def visualize_ast(self, root, filename="regex_ast", format="png", render_images=False):
+        """Visualiza el AST usando Graphviz"""
+        if not GRAPHVIZ_AVAILABLE:
+            print(" No se puede visualizar: Graphviz no está disponible")
+            return None
         
-        add_nodes(root)
+        dot = graphviz.Source(self.ast_to_dot(root))
         
         try:
-            dot.render(filename, format=format, cleanup=True)
-            print(f"   🎨 AST visualizado en: {filename}.{format}")
+            if render_images:
+                dot.render(filename, format=format, cleanup=True)
+                print(f"   🎨 AST visualizado en: {filename}.{format}")
+            else:
+                # Solo el código DOT: sin lanzar el proceso de Graphviz
+                dot.save(f"{filename}.dot")
+                print(f"   🎨 AST guardado en: {filename}.dot")
             return dot
         except Exception as e:
             print(f"    Error al generar visualización: {e}")
@@ -147,6 +452,8 @@ class RegexASTBuilder:
     
     def print_ast_text(self, root, level=0, prefix=""):
         """Imprime el AST en formato texto"""
+        if isinstance(root, CompactAST):
+            root = root.to_node()
         if root is None:
             return
         
@@ -3,13 +3,29 @@ Constructores de autómatas: Thompson, Construcción por Subconjuntos y Minimiza
 Implementa los algoritmos para convertir AST → AFN → AFD → AFD Minimizado.
 """
 
+from collections import deque
+
 try:
     import graphviz
     GRAPHVIZ_AVAILABLE = True
 except ImportError:
     GRAPHVIZ_AVAILABLE = False
 
-from models import NFAState, NFA, DFAState, DFA
+from models import NFAState, NFA, DFAState, DFA, iter_bits
+from ast_builder import ASTNode, CompactAST, SymbolKind
+
+# Operadores que construye el algoritmo de Thompson
+_THOMPSON_OPS = frozenset(".|*")
+
+
+def _dot_escape(text):
+    """Escapar un símbolo para usarlo dentro de una cadena DOT entre comillas"""
+    return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _subset_label(nfa_states):
+    """Etiqueta {id,id,...} de un subconjunto de estados AFN, ordenada por id"""
+    return '{' + ','.join(map(str, sorted(state.id for state in nfa_states))) + '}'
 
 
 class ThompsonNFAConstructor:
@@ -25,53 +41,70 @@ class ThompsonNFAConstructor:
         return state
     
     def construct_nfa(self, ast_root):
-        """Construir AFN desde AST usando Thompson"""
+        """Construir AFN desde AST (CompactAST o ASTNode) usando Thompson"""
         if ast_root is None:
             return None
+        if isinstance(ast_root, ASTNode):
+            ast_root = CompactAST.from_node(ast_root)
+        if not len(ast_root):
+            return None
         
         self.state_counter = 0
-        return self._build_nfa_recursive(ast_root)
+        return self._build_nfa(ast_root, ast_root.root)
     
-    def _build_nfa_recursive(self, node):
-        """Construir AFN recursivamente desde un nodo AST"""
-        if node.is_leaf():
-            # Caso base: símbolo terminal
-            return self._construct_basic(node.value)
-        
-        # Casos recursivos según el operador
-        if node.value == '.':  # Concatenación
-            left_nfa = self._build_nfa_recursive(node.left)
-            right_nfa = self._build_nfa_recursive(node.right)
-            return self._construct_concatenation(left_nfa, right_nfa)
-        
-        elif node.value == '|':  # Unión
-            left_nfa = self._build_nfa_recursive(node.left)
-            right_nfa = self._build_nfa_recursive(node.right)
-            return self._construct_union(left_nfa, right_nfa)
-        
-        elif node.value == '*':  # Estrella de Kleene
-            child_nfa = self._build_nfa_recursive(node.left)
-            return self._construct_kleene_star(child_nfa)
-        
-        else:
-            raise ValueError(f"Operador no soportado: {node.value}")
+    def _build_nfa(self, ast, root):
+        """Construir AFN desde un nodo (índice) del AST con un recorrido post-orden iterativo"""
+        values, left, right, kinds = ast.values, ast.left, ast.right, ast.kinds
+        results = []  # AFNs de los subárboles ya construidos
+        stack = [(root, False)]  # (índice, hijos ya encolados)
+        
+        while stack:
+            index, expanded = stack.pop()
+            value = values[index]
+            
+            if ast.is_leaf(index):
+                # Caso base: símbolo terminal
+                results.append(self._construct_basic(value, kinds[index]))
+            
+            elif not expanded:
+                if value not in _THOMPSON_OPS:
+                    raise ValueError(f"Operador no soportado: {value}")
+                # Visitar primero el hijo izquierdo, luego el derecho y al final el operador
+                stack.append((index, True))
+                if value != '*':
+                    stack.append((right[index], False))
+                stack.append((left[index], False))
+            
+            elif value == '*':  # Estrella de Kleene
+                results.append(self._construct_kleene_star(results.pop()))
+            
+            else:
+                right_nfa = results.pop()
+                left_nfa = results.pop()
+                if value == '.':  # Concatenación
+                    results.append(self._construct_concatenation(left_nfa, right_nfa))
+                else:  # Unión
+                    results.append(self._construct_union(left_nfa, right_nfa))
+        
+        return results.pop()
     
-    def _construct_basic(self, symbol):
-        """Construcción Thompson para símbolo básico"""
+    def _construct_basic(self, symbol, kind=None):
+        """Construcción Thompson para símbolo básico (kind: SymbolKind de la hoja)"""
+        if kind is None:
+            kind = SymbolKind.of_leaf(symbol)
         start = self.new_state()
         final = self.new_state(is_final=True)
         
         # Manejar símbolos especiales
-        if symbol == 'ε':
+        if kind == SymbolKind.EPSILON:
             start.add_epsilon_transition(final)
-        elif symbol.startswith('L'):
+        elif kind == SymbolKind.LITERAL:
             # Literal escapado - usar el carácter sin el prefijo L
-            actual_symbol = symbol[1:] if len(symbol) > 1 else symbol
-            start.add_transition(actual_symbol, final)
+            start.add_transition(symbol[1:], final)
         else:
             start.add_transition(symbol, final)
         
-        return NFA(start, final)
+        return NFA(start, [final])
     
     def _construct_concatenation(self, nfa1, nfa2):
         """Construcción Thompson para concatenación"""
@@ -96,7 +129,7 @@ class ThompsonNFAConstructor:
             final_state.is_final = False
             final_state.add_epsilon_transition(new_final)
         
-        return NFA(new_start, new_final)
+        return NFA(new_start, [new_final])
     
     def _construct_kleene_star(self, nfa):
         """Construcción Thompson para estrella de Kleene (*)"""
@@ -116,45 +149,56 @@ class ThompsonNFAConstructor:
             # Epsilon de vuelta al inicio para repeticiones
             final_state.add_epsilon_transition(nfa.start_state)
         
-        return NFA(new_start, new_final)
+        return NFA(new_start, [new_final])
     
-    def visualize_nfa(self, nfa, filename="thompson_nfa", format="png"):
-        """Visualizar AFN usando Graphviz"""
-        if not GRAPHVIZ_AVAILABLE:
-            print(" No se puede visualizar: Graphviz no está disponible")
-            return None
-        
-        dot = graphviz.Digraph(comment='Thompson NFA')
-        dot.attr(rankdir='LR')  # Left to Right
-        dot.attr('node', shape='circle')
+    def nfa_to_dot(self, nfa):
+        """Generar el código DOT del AFN"""
+        lines = ['// Thompson NFA', 'digraph {', '\trankdir=LR', '\tnode [shape=circle]']
         
         # Agregar nodos
         for state in nfa.states:
             if state.is_final:
-                dot.node(str(state.id), str(state.id), shape='doublecircle', style='filled', fillcolor='lightgreen')
+                lines.append(f'\t{state.id} [label={state.id} fillcolor=lightgreen shape=doublecircle style=filled]')
             elif state == nfa.start_state:
-                dot.node(str(state.id), str(state.id), style='filled', fillcolor='lightblue')
+                lines.append(f'\t{state.id} [label={state.id} fillcolor=lightblue style=filled]')
             else:
-                dot.node(str(state.id), str(state.id))
+                lines.append(f'\t{state.id} [label={state.id}]')
         
         # Agregar estado invisible para flecha de inicio
-        dot.node('start', '', shape='point')
-        dot.edge('start', str(nfa.start_state.id), label='start')
+        lines.append('\tstart [label="" shape=point]')
+        lines.append(f'\tstart -> {nfa.start_state.id} [label=start]')
         
         # Agregar transiciones
         for state in nfa.states:
             # Transiciones con símbolos
             for symbol, target_states in state.transitions.items():
+                label = _dot_escape(symbol)
                 for target in target_states:
-                    dot.edge(str(state.id), str(target.id), label=symbol)
+                    lines.append(f'\t{state.id} -> {target.id} [label="{label}"]')
             
             # Transiciones epsilon
             for target in state.epsilon_transitions:
-                dot.edge(str(state.id), str(target.id), label='ε', style='dashed')
+                lines.append(f'\t{state.id} -> {target.id} [label="ε" style=dashed]')
+        
+        lines.append('}')
+        return '\n'.join(lines)
+    
+    def visualize_nfa(self, nfa, filename="thompson_nfa", format="png", render_images=False):
+        """Visualizar AFN usando Graphviz"""
+        if not GRAPHVIZ_AVAILABLE:
+            print(" No se puede visualizar: Graphviz no está disponible")
+            return None
+        
+        dot = graphviz.Source(self.nfa_to_dot(nfa))
         
         try:
-            dot.render(filename, format=format, cleanup=True)
-            print(f"    AFN visualizado en: {filename}.{format}")
+            if render_images:
+                dot.render(filename, format=format, cleanup=True)
+                print(f"    AFN visualizado en: {filename}.{format}")
+            else:
+                # Solo el código DOT: sin lanzar el proceso de Graphviz
+                dot.save(f"{filename}.dot")
+                print(f"    AFN guardado en: {filename}.dot")
             return dot
         except Exception as e:
             print(f"    Error al generar visualización del AFN: {e}")
@@ -164,7 +208,8 @@ class ThompsonNFAConstructor:
 class SubsetConstructor:
     """Constructor de AFD usando el algoritmo de construcción por subconjuntos"""
     
-    def __init__(self):
+    def __init__(self, verbose=False):
+        self.verbose = verbose  # Mostrar cada transición δ creada
         self.state_counter = 0
         self.subset_to_dfa_state = {}  # Mapeo de conjuntos de estados AFN a estados AFD
     
@@ -176,58 +221,54 @@ class SubsetConstructor:
         self.state_counter = 0
         self.subset_to_dfa_state = {}
         
+        # Subconjuntos como máscaras de bits: la máscara misma es la clave del subconjunto
+        nfa_states, index, eclose, move, sources = nfa.build_bitset_tables()
+        final_mask = 0
+        for nfa_state in nfa.final_states:
+            final_mask |= 1 << index[nfa_state]
+        
         # Estado inicial del AFD: clausura epsilon del estado inicial del AFN
-        initial_subset = nfa.get_epsilon_closure([nfa.start_state])
-        initial_dfa_state = self._get_or_create_dfa_state(initial_subset, nfa.final_states)
+        initial_subset = eclose[index[nfa.start_state]]
+        initial_dfa_state = self._create_dfa_state(initial_subset, nfa_states, final_mask)
         
-        # Cola de subconjuntos por procesar
-        worklist = [initial_subset]
-        processed = set()
-        dfa_states = {initial_dfa_state}
+        # Cola de subconjuntos por procesar (cada uno se encola una sola vez, al crearse)
+        worklist = deque([initial_subset])
         final_dfa_states = set()
+        alphabet = sorted(nfa.alphabet)
         
         if initial_dfa_state.is_final:
             final_dfa_states.add(initial_dfa_state)
         
-        print(f"      Estado inicial AFD: {initial_dfa_state.id} = {{{', '.join(str(s.id) for s in initial_subset)}}}")
+        verbose = self.verbose
+        if verbose:
+            print(f"      Estado inicial AFD: {initial_dfa_state.id} = {{{', '.join(str(nfa_states[i].id) for i in iter_bits(initial_subset))}}}")
         
         while worklist:
-            current_subset = worklist.pop(0)
-            current_subset_key = self._subset_to_key(current_subset)
-            
-            if current_subset_key in processed:
-                continue
-            processed.add(current_subset_key)
-            
-            current_dfa_state = self.subset_to_dfa_state[current_subset_key]
+            current_subset = worklist.popleft()
+            current_dfa_state = self.subset_to_dfa_state[current_subset]
             
             # Para cada símbolo del alfabeto
-            for symbol in sorted(nfa.alphabet):
-                # Calcular el conjunto de estados alcanzables con este símbolo
-                next_subset = set()
-                for nfa_state in current_subset:
-                    if symbol in nfa_state.transitions:
-                        next_subset.update(nfa_state.transitions[symbol])
-                
-                if next_subset:
-                    # Aplicar clausura epsilon
-                    next_subset = nfa.get_epsilon_closure(next_subset)
-                    next_dfa_state = self._get_or_create_dfa_state(next_subset, nfa.final_states)
+            for symbol in alphabet:
+                # Solo los estados con transición por el símbolo; move ya incluye la clausura-ε
+                active = current_subset & sources[symbol]
+                if active:
+                    successors = move[symbol]
+                    next_subset = 0
+                    for i in iter_bits(active):
+                        next_subset |= successors[i]
+                    
+                    next_dfa_state = self.subset_to_dfa_state.get(next_subset)
+                    if next_dfa_state is None:
+                        next_dfa_state = self._create_dfa_state(next_subset, nfa_states, final_mask)
+                        worklist.append(next_subset)
+                        if next_dfa_state.is_final:
+                            final_dfa_states.add(next_dfa_state)
                     
                     # Agregar transición al AFD
                     current_dfa_state.add_transition(symbol, next_dfa_state)
                     
-                    # Agregar a conjuntos correspondientes
-                    dfa_states.add(next_dfa_state)
-                    if next_dfa_state.is_final:
-                        final_dfa_states.add(next_dfa_state)
-                    
-                    # Agregar a cola si no ha sido procesado
-                    next_subset_key = self._subset_to_key(next_subset)
-                    if next_subset_key not in processed:
-                        worklist.append(next_subset)
-                    
-                    print(f"      δ({current_dfa_state.id}, {symbol}) = {next_dfa_state.id}")
+                    if verbose:
+                        print(f"      δ({current_dfa_state.id}, {symbol}) = {next_dfa_state.id}")
         
         # Crear AFD final
         dfa = DFA(initial_dfa_state, final_dfa_states, nfa.alphabet)
@@ -239,64 +280,62 @@ class SubsetConstructor:
         
         return dfa
     
-    def _get_or_create_dfa_state(self, nfa_subset, nfa_final_states):
-        """Obtener o crear estado AFD para un subconjunto de estados AFN"""
-        subset_key = self._subset_to_key(nfa_subset)
-        
-        if subset_key in self.subset_to_dfa_state:
-            return self.subset_to_dfa_state[subset_key]
-        
-        # Determinar si es estado final
-        is_final = any(nfa_state in nfa_final_states for nfa_state in nfa_subset)
-        
-        # Crear nuevo estado AFD
-        dfa_state = DFAState(self.state_counter, nfa_subset, is_final)
+    def _create_dfa_state(self, subset, nfa_states, final_mask):
+        """Crear el estado AFD de un subconjunto (máscara de bits) de estados AFN"""
+        nfa_subset = {nfa_states[i] for i in iter_bits(subset)}
+        dfa_state = DFAState(self.state_counter, nfa_subset, bool(subset & final_mask))
         self.state_counter += 1
         
         # Guardar mapeo
-        self.subset_to_dfa_state[subset_key] = dfa_state
+        self.subset_to_dfa_state[subset] = dfa_state
         
         return dfa_state
     
-    def _subset_to_key(self, nfa_subset):
-        """Convertir subconjunto de estados AFN a clave única"""
-        return tuple(sorted(state.id for state in nfa_subset))
-    
-    def visualize_dfa(self, dfa, filename="subset_dfa", format="png"):
-        """Visualizar AFD usando Graphviz"""
-        if not GRAPHVIZ_AVAILABLE:
-            print(" No se puede visualizar: Graphviz no está disponible")
-            return None
-        
-        dot = graphviz.Digraph(comment='Subset Construction DFA')
-        dot.attr(rankdir='LR')  # Left to Right
-        dot.attr('node', shape='circle')
+    def dfa_to_dot(self, dfa):
+        """Generar el código DOT del AFD"""
+        lines = ['// Subset Construction DFA', 'digraph {', '\trankdir=LR', '\tnode [shape=circle]']
         
         # Agregar nodos
         for state in dfa.states:
             # Crear etiqueta con estados AFN representados
-            nfa_states_str = '{' + ','.join(str(s.id) for s in sorted(state.nfa_states, key=lambda x: x.id)) + '}'
+            nfa_states_str = _subset_label(state.nfa_states)
             label = f"{state.id}\\n{nfa_states_str}"
             
             if state.is_final:
-                dot.node(str(state.id), label, shape='doublecircle', style='filled', fillcolor='lightgreen')
+                lines.append(f'\t{state.id} [label="{label}" fillcolor=lightgreen shape=doublecircle style=filled]')
             elif state == dfa.start_state:
-                dot.node(str(state.id), label, style='filled', fillcolor='lightblue')
+                lines.append(f'\t{state.id} [label="{label}" fillcolor=lightblue style=filled]')
             else:
-                dot.node(str(state.id), label)
+                lines.append(f'\t{state.id} [label="{label}"]')
         
         # Agregar estado invisible para flecha de inicio
-        dot.node('start', '', shape='point')
-        dot.edge('start', str(dfa.start_state.id), label='start')
+        lines.append('\tstart [label="" shape=point]')
+        lines.append(f'\tstart -> {dfa.start_state.id} [label=start]')
         
         # Agregar transiciones
         for state in dfa.states:
             for symbol, target_state in state.transitions.items():
-                dot.edge(str(state.id), str(target_state.id), label=symbol)
+                lines.append(f'\t{state.id} -> {target_state.id} [label="{_dot_escape(symbol)}"]')
+        
+        lines.append('}')
+        return '\n'.join(lines)
+    
+    def visualize_dfa(self, dfa, filename="subset_dfa", format="png", render_images=False):
+        """Visualizar AFD usando Graphviz"""
+        if not GRAPHVIZ_AVAILABLE:
+            print(" No se puede visualizar: Graphviz no está disponible")
+            return None
+        
+        dot = graphviz.Source(self.dfa_to_dot(dfa))
         
         try:
-            dot.render(filename, format=format, cleanup=True)
-            print(f"    🎨 AFD visualizado en: {filename}.{format}")
+            if render_images:
+                dot.render(filename, format=format, cleanup=True)
+                print(f"    🎨 AFD visualizado en: {filename}.{format}")
+            else:
+                # Solo el código DOT: sin lanzar el proceso de Graphviz
+                dot.save(f"{filename}.dot")
+                print(f"    🎨 AFD guardado en: {filename}.dot")
             return dot
         except Exception as e:
             print(f"    Error al generar visualización del AFD: {e}")
@@ -304,9 +343,10 @@ class SubsetConstructor:
 
 
 class DFAMinimizer:
-    """Minimizador de AFD usando algoritmo de partición por equivalencia"""
+    """Minimizador de AFD usando refinamiento de particiones (algoritmo de Hopcroft)"""
     
-    def __init__(self):
+    def __init__(self, verbose=False):
+        self.verbose = verbose  # Mostrar los grupos iniciales y las divisiones del refinamiento
         self.state_counter = 0
         self.equivalence_classes = []
         self.state_to_class = {}
@@ -315,6 +355,10 @@ class DFAMinimizer:
         """Minimizar AFD usando algoritmo de partición"""
         print(f"    🔄 Iniciando minimización del AFD...")
         
+        # Reiniciar clases de equivalencia
+        self.equivalence_classes = []
+        self.state_to_class = {}
+        
         if len(dfa.states) <= 1:
             print(f"    ✅ AFD ya es mínimo (1 estado o menos)")
             return dfa
@@ -330,41 +374,23 @@ class DFAMinimizer:
             partitions.append(final_states)
         
         print(f"      Partición inicial: {len(partitions)} grupos")
-        for i, partition in enumerate(partitions):
-            state_ids = [str(s.id) for s in partition]
-            print(f"        Grupo {i}: {{{', '.join(state_ids)}}}")
-        
-        # Paso 2: Refinar particiones hasta convergencia
-        changed = True
-        iteration = 0
-        
-        while changed:
-            iteration += 1
-            changed = False
-            new_partitions = []
-            
-            print(f"      Iteración {iteration}:")
-            
-            for partition in partitions:
-                # Intentar dividir esta partición
-                sub_partitions = self._split_partition(partition, partitions, dfa.alphabet)
-                
-                if len(sub_partitions) > 1:
-                    changed = True
-                    print(f"        Dividiendo grupo: {len(sub_partitions)} nuevos subgrupos")
-                    for j, sub_part in enumerate(sub_partitions):
-                        state_ids = [str(s.id) for s in sub_part]
-                        print(f"          Subgrupo {j}: {{{', '.join(state_ids)}}}")
-                
-                new_partitions.extend(sub_partitions)
-            
-            partitions = new_partitions
+        if self.verbose:
+            for i, partition in enumerate(partitions):
+                state_ids = [str(s.id) for s in partition]
+                print(f"        Grupo {i}: {{{', '.join(state_ids)}}}")
+        
+        # Paso 2: Refinar particiones (algoritmo de Hopcroft) con la tabla inversa
+        states, index, inverse = self._build_inverse_table(dfa)
+        partitions = self._refine_partitions(partitions, states, index, inverse)
+        
+        # Clase de equivalencia (índice de partición) de cada estado original
+        self.equivalence_classes = partitions
+        self.state_to_class = {state: ci for ci, partition in enumerate(partitions) for state in partition}
         
-        print(f"      Convergencia alcanzada en {iteration} iteraciones")
         print(f"      Particiones finales: {len(partitions)} grupos")
         
         # Paso 3: Construir AFD minimizado
-        minimized_dfa = self._build_minimized_dfa(dfa, partitions)
+        minimized_dfa = self._build_minimized_dfa(dfa, partitions, self.state_to_class)
         
         print(f"    ✅ AFD minimizado:")
         print(f"      - Estados originales: {len(dfa.states)}")
@@ -373,44 +399,100 @@ class DFAMinimizer:
         
         return minimized_dfa
     
-    def _split_partition(self, partition, all_partitions, alphabet):
-        """Dividir una partición basada en comportamiento equivalente"""
-        if len(partition) <= 1:
-            return [partition]
-        
-        # Crear grupos basados en el comportamiento de transición
-        behavior_groups = {}
-        
-        for state in partition:
-            # Crear una "huella" del comportamiento del estado
-            behavior = []
-            for symbol in sorted(alphabet):
-                if symbol in state.transitions:
-                    target_state = state.transitions[symbol]
-                    # Encontrar a qué partición pertenece el estado destino
-                    target_partition_idx = None
-                    for i, part in enumerate(all_partitions):
-                        if target_state in part:
-                            target_partition_idx = i
-                            break
-                    behavior.append(target_partition_idx)
-                else:
-                    behavior.append(None)  # Sin transición
-            
-            behavior_tuple = tuple(behavior)
-            if behavior_tuple not in behavior_groups:
-                behavior_groups[behavior_tuple] = set()
-            behavior_groups[behavior_tuple].add(state)
+    def _build_inverse_table(self, dfa):
+        """
+        Numerar los estados del AFD (por id) y construir sus transiciones inversas:
+        inverse[símbolo][q] = predecesores de q con ese símbolo. Las transiciones ausentes
+        van a un estado sumidero virtual (índice len(estados)) que se cicla a sí mismo.
+        Retorna (estados, índice, inverse).
+        """
+        states = sorted(dfa.states, key=lambda state: state.id)
+        index = {state: i for i, state in enumerate(states)}
+        sink = len(states)
+        symbols = sorted(dfa.alphabet)
+        
+        inverse = {symbol: [[] for _ in range(sink + 1)] for symbol in symbols}
+        for i, state in enumerate(states):
+            for symbol in symbols:
+                target = state.transitions.get(symbol)
+                inverse[symbol][sink if target is None else index[target]].append(i)
+        for symbol in symbols:
+            inverse[symbol][sink].append(sink)
+        
+        return states, index, inverse
+    
+    def _refine_partitions(self, partitions, states, index, inverse):
+        """
+        Refinamiento de Hopcroft: divide los grupos con las transiciones inversas de
+        cada divisor (grupo, símbolo) y encola solo la mitad más pequeña de cada división.
+        El sumidero virtual tiene su propio grupo inicial, de modo que "sin transición"
+        sigue siendo un comportamiento distinto.
+        """
+        sink = len(states)
+        symbols = list(inverse)
+        
+        blocks = [{index[state] for state in partition} for partition in partitions]
+        blocks.append({sink})
+        block_of = [0] * (sink + 1)
+        for b, block in enumerate(blocks):
+            for q in block:
+                block_of[q] = b
+        
+        # Divisores iniciales: todos los grupos salvo el más grande
+        largest = max(range(len(blocks)), key=lambda b: len(blocks[b]))
+        worklist = deque((b, symbol) for b in range(len(blocks)) if b != largest for symbol in symbols)
+        pending = set(worklist)
+        splits = 0
         
-        return list(behavior_groups.values())
+        while worklist:
+            splitter = worklist.popleft()
+            pending.discard(splitter)
+            block_idx, symbol = splitter
+            
+            # Estados que llegan al divisor con el símbolo, agrupados por su grupo actual
+            predecessors = inverse[symbol]
+            touched = {}
+            for q in blocks[block_idx]:
+                for p in predecessors[q]:
+                    touched.setdefault(block_of[p], set()).add(p)
+            
+            for b, inside in touched.items():
+                block = blocks[b]
+                if len(inside) == len(block):
+                    continue
+                
+                # Dividir el grupo b en (b ∩ X) y (b \ X)
+                outside = block - inside
+                new_idx = len(blocks)
+                blocks[b] = inside
+                blocks.append(outside)
+                for q in outside:
+                    block_of[q] = new_idx
+                splits += 1
+                
+                smaller = new_idx if len(outside) <= len(inside) else b
+                for sym in symbols:
+                    if (b, sym) in pending:
+                        entry = (new_idx, sym)
+                    else:
+                        entry = (smaller, sym)
+                    if entry not in pending:
+                        pending.add(entry)
+                        worklist.append(entry)
+        
+        if self.verbose:
+            print(f"      Refinamiento (Hopcroft): {splits} divisiones")
+        
+        # Grupos finales sin el sumidero, ordenados por su menor estado original
+        result = [block for block in blocks if sink not in block]
+        result.sort(key=min)
+        return [{states[q] for q in block} for block in result]
     
-    def _build_minimized_dfa(self, original_dfa, partitions):
-        """Construir AFD minimizado desde las particiones"""
+    def _build_minimized_dfa(self, original_dfa, partitions, state_to_class):
+        """Construir AFD minimizado desde las particiones (state_to_class: estado → índice de su partición)"""
         self.state_counter = 0
-        partition_to_new_state = {}
-        new_states = set()
+        new_states = []  # new_states[clase] = estado del AFD minimizado
         new_final_states = set()
-        new_start_state = None
         
         # Crear nuevos estados para cada partición
         for partition in partitions:
@@ -419,75 +501,72 @@ class DFAMinimizer:
             for old_state in partition:
                 new_state.nfa_states.update(old_state.nfa_states)
             
-            # Determinar si es estado final
-            if any(old_state in original_dfa.final_states for old_state in partition):
+            # Determinar si es estado final: los grupos nunca mezclan finales y no finales,
+            # así que basta con un representante
+            if next(iter(partition)) in original_dfa.final_states:
                 new_state.is_final = True
                 new_final_states.add(new_state)
             
-            # Determinar si es estado inicial
-            if original_dfa.start_state in partition:
-                new_start_state = new_state
-            
-            partition_to_new_state[id(partition)] = new_state
-            new_states.add(new_state)
+            new_states.append(new_state)
             self.state_counter += 1
         
         # Crear transiciones para los nuevos estados
-        for partition in partitions:
-            new_state = partition_to_new_state[id(partition)]
+        for new_state, partition in zip(new_states, partitions):
             representative = next(iter(partition))  # Tomar un estado representativo
-            
-            for symbol in original_dfa.alphabet:
-                if symbol in representative.transitions:
-                    target_state = representative.transitions[symbol]
-                    
-                    # Encontrar la partición del estado destino
-                    for target_partition in partitions:
-                        if target_state in target_partition:
-                            target_new_state = partition_to_new_state[id(target_partition)]
-                            new_state.add_transition(symbol, target_new_state)
-                            break
+            for symbol, target_state in representative.transitions.items():
+                new_state.add_transition(symbol, new_states[state_to_class[target_state]])
         
+        new_start_state = new_states[state_to_class[original_dfa.start_state]]
         return DFA(new_start_state, new_final_states, original_dfa.alphabet)
     
-    def visualize_minimized_dfa(self, dfa, filename="minimized_dfa", format="png"):
-        """Visualizar AFD minimizado usando Graphviz"""
-        if not GRAPHVIZ_AVAILABLE:
-            print(" No se puede visualizar: Graphviz no está disponible")
-            return None
-        
-        dot = graphviz.Digraph(comment='Minimized DFA')
-        dot.attr(rankdir='LR')  # Left to Right
-        dot.attr('node', shape='circle')
+    def minimized_dfa_to_dot(self, dfa):
+        """Generar el código DOT del AFD minimizado"""
+        lines = ['// Minimized DFA', 'digraph {', '\trankdir=LR', '\tnode [shape=circle]']
         
         # Agregar nodos
         for state in dfa.states:
             # Crear etiqueta con estados AFN representados
             if state.nfa_states:
-                nfa_states_str = '{' + ','.join(str(s.id) for s in sorted(state.nfa_states, key=lambda x: x.id)) + '}'
+                nfa_states_str = _subset_label(state.nfa_states)
                 label = f"M{state.id}\\n{nfa_states_str}"
             else:
                 label = f"M{state.id}"
             
             if state.is_final:
-                dot.node(str(state.id), label, shape='doublecircle', style='filled', fillcolor='lightcoral')
+                lines.append(f'\t{state.id} [label="{label}" fillcolor=lightcoral shape=doublecircle style=filled]')
             elif state == dfa.start_state:
-                dot.node(str(state.id), label, style='filled', fillcolor='lightsteelblue')
+                lines.append(f'\t{state.id} [label="{label}" fillcolor=lightsteelblue style=filled]')
             else:
-                dot.node(str(state.id), label)
+                lines.append(f'\t{state.id} [label="{label}"]')
         
         # Agregar estado invisible para flecha de inicio
-        dot.node('start', '', shape='point')
-        dot.edge('start', str(dfa.start_state.id), label='start')
+        lines.append('\tstart [label="" shape=point]')
+        lines.append(f'\tstart -> {dfa.start_state.id} [label=start]')
         
         # Agregar transiciones
         for state in dfa.states:
             for symbol, target_state in state.transitions.items():
-                dot.edge(str(state.id), str(target_state.id), label=symbol)
+                lines.append(f'\t{state.id} -> {target_state.id} [label="{_dot_escape(symbol)}"]')
+        
+        lines.append('}')
+        return '\n'.join(lines)
+    
+    def visualize_minimized_dfa(self, dfa, filename="minimized_dfa", format="png", render_images=False):
+        """Visualizar AFD minimizado usando Graphviz"""
+        if not GRAPHVIZ_AVAILABLE:
+            print(" No se puede visualizar: Graphviz no está disponible")
+            return None
+        
+        dot = graphviz.Source(self.minimized_dfa_to_dot(dfa))
         
         try:
-            dot.render(filename, format=format, cleanup=True)
-            print(f"    🎨 AFD minimizado visualizado en: {filename}.{format}")
+            if render_images:
+                dot.render(filename, format=format, cleanup=True)
+                print(f"    🎨 AFD minimizado visualizado en: {filename}.{format}")
+            else:
+                # Solo el código DOT: sin lanzar el proceso de Graphviz
+                dot.save(f"{filename}.dot")
+                print(f"    🎨 AFD minimizado guardado en: {filename}.dot")
             return dot
         except Exception as e:
             print(f"    Error al generar visualización del AFD minimizado: {e}")
@@ -1,25 +1,37 @@
 """
 Modelos de datos para autómatas finitos.
-Contiene las definiciones de NFAState, NFA, DFAState y DFA.
+Contiene las definiciones de NFAState, NFA, DFAState, DFA y LiteralAltAutomaton.
 """
 
+def iter_bits(mask):
+    """Índices de los bits encendidos de una máscara, de menor a mayor"""
+    # Buscar los '1' en el texto binario invertido: lineal en el tamaño de la máscara,
+    # en lugar de una operación sobre el entero completo por cada bit encendido
+    digits = bin(mask)[:1:-1]
+    i = digits.find('1')
+    while i >= 0:
+        yield i
+        i = digits.find('1', i + 1)
+
+
 class NFAState:
     """Estado de un Autómata Finito No Determinista"""
     def __init__(self, state_id, is_final=False):
         self.id = state_id
         self.is_final = is_final
-        self.transitions = {}  # {symbol: [list_of_states]}
-        self.epsilon_transitions = []  # Lista de estados alcanzables con ε
+        # Destinos como dict {estado: None}: conserva el orden de inserción y no repite aristas
+        self.transitions = {}  # {symbol: {state: None}}
+        self.epsilon_transitions = {}  # Estados alcanzables con ε
     
     def add_transition(self, symbol, target_state):
-        """Agregar transición con símbolo"""
+        """Agregar transición con símbolo (sin duplicados)"""
         if symbol not in self.transitions:
-            self.transitions[symbol] = []
-        self.transitions[symbol].append(target_state)
+            self.transitions[symbol] = {}
+        self.transitions[symbol][target_state] = None
     
     def add_epsilon_transition(self, target_state):
-        """Agregar transición epsilon"""
-        self.epsilon_transitions.append(target_state)
+        """Agregar transición epsilon (sin duplicados)"""
+        self.epsilon_transitions[target_state] = None
     
     def __repr__(self):
         return f"State({self.id}{'*' if self.is_final else ''})"
@@ -29,9 +41,11 @@ class NFA:
     """Autómata Finito No Determinista"""
     def __init__(self, start_state, final_states):
         self.start_state = start_state
-        self.final_states = final_states if isinstance(final_states, list) else [final_states]
+        self.final_states = final_states  # list[NFAState]
         self.states = set()
         self.alphabet = set()
+        self._bitset_tables = None  # Tablas empaquetadas (ver build_bitset_tables)
+        self._simulation_masks = None  # (clausura inicial, estados finales) como máscaras
         self._collect_states_and_alphabet()
     
     def _collect_states_and_alphabet(self):
@@ -59,36 +73,187 @@ class NFA:
                     stack.append(target)
     
     def get_epsilon_closure(self, states):
-        """Obtener clausura epsilon de un conjunto de estados"""
-        closure = set(states)
-        stack = list(states)
+        """Obtener clausura epsilon de un conjunto de estados (sobre las tablas de bits)"""
+        nfa_states, index, eclose, move, sources = self.build_bitset_tables()
+        closure = 0
+        for state in states:
+            closure |= eclose[index[state]]
+        return {nfa_states[i] for i in iter_bits(closure)}
+    
+    def build_bitset_tables(self):
+        """
+        Tablas de conjuntos de estados como máscaras de bits (bit i = i-ésimo estado por id).
+        Retorna (estados, índice, eclose, move, sources): índice[estado] es su posición i,
+        eclose[i] la clausura-ε del estado i, move[símbolo][i] la clausura-ε de los sucesores
+        del estado i con ese símbolo (cadenas ε ya aplanadas) y sources[símbolo] los estados
+        con transición por ese símbolo.
+        Las tablas se construyen una vez y se reutilizan.
+        """
+        if self._bitset_tables is not None:
+            return self._bitset_tables
+        
+        states = sorted(self.states, key=lambda state: state.id)
+        index = {state: i for i, state in enumerate(states)}
+        move = {symbol: [0] * len(states) for symbol in self.alphabet}
+        sources = dict.fromkeys(self.alphabet, 0)
+        edges = []  # (símbolo, origen, índices destino): solo las transiciones existentes
+        epsilon = []  # Sucesores ε directos de cada estado (índices)
+        
+        for i, state in enumerate(states):
+            for symbol, targets in state.transitions.items():
+                edges.append((symbol, i, [index[target] for target in targets]))
+            epsilon.append([index[target] for target in state.epsilon_transitions])
+        
+        eclose = self._epsilon_closures(epsilon)
+        
+        # Aplanar las cadenas ε: cada transición lleva directamente a la clausura del destino
+        for symbol, i, targets in edges:
+            closure = 0
+            for j in targets:
+                closure |= eclose[j]
+            move[symbol][i] = closure
+            sources[symbol] |= 1 << i
+        
+        self._bitset_tables = (states, index, eclose, move, sources)
+        return self._bitset_tables
+    
+    @staticmethod
+    def _epsilon_closures(successors):
+        """
+        Clausura-ε de cada estado a partir de sus sucesores ε directos (listas de índices).
+        Las componentes fuertemente conexas del grafo ε (Tarjan iterativo) salen en
+        orden topológico inverso, así que cada componente solo une las clausuras ya
+        completas de sus sucesores: una operación por arista en lugar de un DFS por estado.
+        """
+        n = len(successors)
+        eclose = [0] * n
+        order = [-1] * n  # Orden de descubrimiento
+        low = [0] * n
+        on_stack = [False] * n
+        component = []
+        counter = 0
+        
+        for root in range(n):
+            if order[root] >= 0:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            component.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            
+            while work:
+                v, k = work[-1]
+                if k < len(successors[v]):
+                    work[-1] = (v, k + 1)
+                    w = successors[v][k]
+                    if order[w] < 0:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        component.append(w)
+                        on_stack[w] = True
+                        work.append((w, 0))
+                    elif on_stack[w] and order[w] < low[v]:
+                        low[v] = order[w]
+                    continue
+                
+                work.pop()
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+                if low[v] != order[v]:
+                    continue
+                
+                # v es raíz de una componente: sus sucesores externos ya están cerrados
+                members = []
+                while True:
+                    w = component.pop()
+                    on_stack[w] = False
+                    members.append(w)
+                    if w == v:
+                        break
+                closure = 0
+                for w in members:
+                    closure |= 1 << w
+                for w in members:
+                    for x in successors[w]:
+                        closure |= eclose[x]  # 0 para los miembros, aún sin asignar
+                for w in members:
+                    eclose[w] = closure
+        
+        return eclose
+    
+    def is_simple(self):
+        """
+        Verdadero si, vistos sin transiciones ε, los estados del AFN tienen lenguajes no
+        vacíos y disjuntos dos a dos: un único estado de aceptación, a lo sumo un
+        predecesor por estado y símbolo (co-determinista) y todos llegan a aceptación.
+        En ese caso la construcción por subconjuntos ya produce el AFD mínimo.
+        """
+        states, index, eclose, move, sources = self.build_bitset_tables()
+        final_mask = 0
+        for state in self.final_states:
+            final_mask |= 1 << index[state]
+        
+        # Vista sin ε: el estado inicial y los destinos directos de cada transición
+        raw = {symbol: [0] * len(states) for symbol in self.alphabet}
+        important = 1 << index[self.start_state]
+        for i, state in enumerate(states):
+            for symbol, targets in state.transitions.items():
+                for target in targets:
+                    raw[symbol][i] |= 1 << index[target]
+                important |= raw[symbol][i]
         
+        accepting = [p for p in iter_bits(important) if eclose[p] & final_mask]
+        if len(accepting) != 1:
+            return False
+        
+        # Co-determinismo: cada (destino, símbolo) tiene un único predecesor
+        predecessors = {}
+        for p in iter_bits(important):
+            for symbol, successors in raw.items():
+                targets = 0
+                for r in iter_bits(eclose[p] & sources[symbol]):
+                    targets |= successors[r]
+                for q in iter_bits(targets):
+                    if predecessors.setdefault((q, symbol), p) != p:
+                        return False
+        
+        # Co-accesibilidad: todos los estados llegan al de aceptación
+        reaches = {accepting[0]}
+        stack = [accepting[0]]
         while stack:
-            state = stack.pop()
-            for epsilon_target in state.epsilon_transitions:
-                if epsilon_target not in closure:
-                    closure.add(epsilon_target)
-                    stack.append(epsilon_target)
+            q = stack.pop()
+            for symbol in raw:
+                p = predecessors.get((q, symbol))
+                if p is not None and p not in reaches:
+                    reaches.add(p)
+                    stack.append(p)
         
-        return closure
+        return len(reaches) == bin(important).count('1')
     
     def simulate(self, input_string):
-        """Simular el AFN con una cadena de entrada"""
-        current_states = self.get_epsilon_closure([self.start_state])
+        """Simular el AFN con una cadena de entrada (sobre las tablas de bits)"""
+        states, index, eclose, move, sources = self.build_bitset_tables()
+        if self._simulation_masks is None:
+            final_mask = 0
+            for i, state in enumerate(states):
+                if state.is_final:
+                    final_mask |= 1 << i
+            self._simulation_masks = (eclose[index[self.start_state]], final_mask)
+        current, final_mask = self._simulation_masks
         
         for symbol in input_string:
-            next_states = set()
-            for state in current_states:
-                if symbol in state.transitions:
-                    next_states.update(state.transitions[symbol])
-            
-            if not next_states:
+            active = current & sources.get(symbol, 0)
+            if not active:
                 return False
             
-            current_states = self.get_epsilon_closure(next_states)
+            successors = move[symbol]
+            current = 0
+            for i in iter_bits(active):
+                current |= successors[i]
         
         # Verificar si algún estado actual es final
-        return any(state.is_final for state in current_states)
+        return bool(current & final_mask)
 
 
 class DFAState:
@@ -105,21 +270,16 @@ class DFAState:
     
     def __repr__(self):
         return f"DFAState({self.id}{'*' if self.is_final else ''})"
-    
-    def __hash__(self):
-        return hash(self.id)
-    
-    def __eq__(self, other):
-        return isinstance(other, DFAState) and self.id == other.id
 
 
 class DFA:
     """Autómata Finito Determinista"""
     def __init__(self, start_state, final_states, alphabet):
         self.start_state = start_state
-        self.final_states = final_states if isinstance(final_states, set) else set(final_states)
+        self.final_states = final_states  # set[DFAState]
         self.alphabet = alphabet
         self.states = set()
+        self._compiled = None  # Tabla de transiciones por índice (ver compile)
         self._collect_states()
     
     def _collect_states(self):
@@ -139,16 +299,53 @@ class DFA:
                 if target_state not in visited:
                     stack.append(target_state)
     
+    def compile(self):
+        """
+        Compilar el AFD a una tabla indexada por enteros: (inicio, filas, es_final), donde
+        filas[i] = {símbolo: índice destino}. Se construye una vez y se reutiliza.
+        """
+        if self._compiled is None:
+            states = sorted(self.states, key=lambda state: state.id)
+            index = {state: i for i, state in enumerate(states)}
+            rows = [{symbol: index[target] for symbol, target in state.transitions.items()}
+                    for state in states]
+            is_final = [state in self.final_states for state in states]
+            self._compiled = (index[self.start_state], rows, is_final)
+        return self._compiled
+    
     def simulate(self, input_string):
         """Simular el AFD con una cadena de entrada"""
-        current_state = self.start_state
+        current, rows, is_final = self.compile()
         
         for symbol in input_string:
-            if symbol not in current_state.transitions:
+            current = rows[current].get(symbol)
+            if current is None:
                 return False
-            current_state = current_state.transitions[symbol]
         
-        return current_state in self.final_states
+        return is_final[current]
+    
+    def simulate_batch(self, strings):
+        """
+        Simular varias cadenas sobre la misma tabla compilada. Cada cadena distinta se
+        recorre una sola vez; retorna la lista de resultados en el orden de entrada.
+        """
+        strings = list(strings)
+        start, rows, is_final = self.compile()
+        results = {}
+        
+        for input_string in strings:
+            if input_string in results:
+                continue
+            current = start
+            for symbol in input_string:
+                current = rows[current].get(symbol)
+                if current is None:
+                    results[input_string] = False
+                    break
+            else:
+                results[input_string] = is_final[current]
+        
+        return [results[input_string] for input_string in strings]
     
     def get_states_count(self):
         """Obtener número de estados"""
@@ -157,3 +354,13 @@ class DFA:
     def get_transitions_count(self):
         """Obtener número de transiciones"""
         return sum(len(state.transitions) for state in self.states)
+
+
+class LiteralAltAutomaton:
+    """Reconocedor especializado para uniones de cadenas literales (ej. abc|def)"""
+    def __init__(self, literals):
+        self.literals = frozenset(literals)
+    
+    def simulate(self, input_string):
+        """Aceptar si la cadena coincide exactamente con alguno de los literales"""
+        return input_string in self.literals
@@ -3,6 +3,91 @@ Parser de expresiones regulares usando el algoritmo Shunting Yard.
 Convierte expresiones regulares de notación infija a postfija.
 """
 
+import re
+from functools import lru_cache
+from array import array
+
+
+# Secuencias de escape: '\' seguido de cualquier carácter
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_ESC_CHARS = frozenset("()[]{}.*+?|^")
+
+# Código del paréntesis de apertura en la pila de operadores (bytearray)
+_LPAREN = ord('(')
+
+# Fila de la tabla de pasos del modo verbose (paso, carácter, acción, pila, postfija)
+_LOG_FMT = "   %-4s | %-6s | %-20s | %-15s | '%s'"
+
+# Códigos de operación del núcleo de Shunting Yard (uno por byte de la expresión)
+_OP_OPERAND, _OP_OPEN, _OP_CLOSE, _OP_OPERATOR, _OP_SKIP = range(5)
+
+# Caracteres Unicode matemáticos → ASCII (una sola pasada con str.translate)
+_UNICODE_TABLE = str.maketrans({
+    '𝑁': 'N', '𝑎': 'a', '𝑏': 'b', '𝑐': 'c', '𝑑': 'd', '𝑒': 'e', '𝑓': 'f', '𝑔': 'g', '𝑕': 'h',
+    '𝑖': 'i', '𝑗': 'j', '𝑘': 'k', '𝑙': 'l', '𝑚': 'm', '𝑛': 'n', '𝑜': 'o', '𝑝': 'p',
+    '𝑞': 'q', '𝑟': 'r', '𝑠': 's', '𝑡': 't', '𝑢': 'u', '𝑣': 'v', '𝑤': 'w', '𝑥': 'x',
+    '𝑦': 'y', '𝑧': 'z', '𝜀': 'ε', '∗': '*'  # Asterisco Unicode a ASCII
+})
+
+# Operandos que is_operand no reconoce como alfanuméricos
+_OPERAND_CHARS = frozenset("[]{}\\n")
+
+# Cierres tras los que puede ir una concatenación implícita, y aperturas antes de las que puede ir
+_CONCAT_LEFT = frozenset(")]}*∗?")
+_CONCAT_RIGHT = frozenset("([{")
+
+# Caracteres que delimitan un operando simple (para + y ?)
+_OPERAND_BOUNDARY = frozenset("()[]|*?+. {}")
+
+
+def _is_literal(token):
+    """Token de literal escapado de dos caracteres (ej. 'L(', 'Ln')"""
+    return len(token) == 2 and token[0] == 'L'
+
+
+def _escape_replacer(match):
+    """Reemplazar una secuencia de escape por su literal L correspondiente"""
+    char = match.group(1)
+    if char in _ESC_CHARS:
+        return f"L{char}"
+    if char == 'n':
+        return "Ln"
+    return char
+
+
+def _shunting_yard_opcodes(data, opcodes, prec):
+    """
+    Shunting Yard sobre los bytes UTF-8 de una expresión formateada. Solo usa enteros y
+    tablas de bytes, sin objetos str por carácter. Los bytes de un operando multibyte
+    (ej. ε) pasan a la salida contiguos y en orden, por lo que el resultado se decodifica
+    directamente.
+    """
+    out, stack = bytearray(), bytearray()
+    push, pop, emit = stack.append, stack.pop, out.append
+    operand, operator, open_paren, close_paren = _OP_OPERAND, _OP_OPERATOR, _OP_OPEN, _OP_CLOSE
+    lparen = _LPAREN
+    
+    for b in data:
+        code = opcodes[b]
+        if code == operand:
+            emit(b)
+        elif code == operator:
+            b_prec = prec[b]
+            while stack and stack[-1] != lparen and prec[stack[-1]] >= b_prec:
+                emit(pop())
+            push(b)
+        elif code == open_paren:
+            push(lparen)
+        elif code == close_paren:
+            while stack and stack[-1] != lparen:
+                emit(pop())
+            if stack: pop()  # Remover '('
+    
+    # Pop operadores restantes
+    out += stack[::-1]
+    
+    return out
+
 
 class ShuntingYardRegex:
     """Convertidor de expresiones regulares de infija a postfija usando Shunting Yard"""
@@ -11,41 +96,40 @@ class ShuntingYardRegex:
         self.precedence = {'(': 1, '|': 2, '.': 3, '?': 4, '*': 4, '^': 5}
         self.binary_ops = {'^', '|', '.'}
         self.all_ops = {'|', '?', '*', '^', '.'}
+        # Tabla de precedencia indexada por código ASCII (para la pila de bytes)
+        self.precedence_table = array('b', bytes(128))
+        for op, prec in self.precedence.items():
+            self.precedence_table[ord(op)] = prec
+        # Código de operación de cada byte (los bytes no ASCII siempre son de operandos)
+        self.opcode_table = bytearray(256)
+        self.opcode_table[ord('(')] = _OP_OPEN
+        self.opcode_table[ord(')')] = _OP_CLOSE
+        self.opcode_table[ord(' ')] = _OP_SKIP
+        for op in self.all_ops:
+            self.opcode_table[ord(op)] = _OP_OPERATOR
+        # Tablas de decisión de concatenación indexadas por código ASCII
+        self.concat_after = tuple(self._can_end_concat(chr(c)) for c in range(128))
+        self.concat_before = tuple(self._can_start_concat(chr(c)) for c in range(128))
     
     def get_precedence(self, c):
+        # Acepta un carácter o su código (elementos de la pila de operadores)
+        if isinstance(c, int):
+            return self.precedence_table[c] if c < 128 else 0
         return self.precedence.get(c, 0)
     
     def is_operator(self, c):
         return c in self.all_ops
     
     def is_operand(self, c):
-        # Manejar caracteres Unicode matemáticos comunes
-        unicode_math_chars = {
-            '𝑎': 'a', '𝑏': 'b', '𝑐': 'c', '𝑑': 'd', '𝑒': 'e', '𝑓': 'f', '𝑔': 'g', '𝑕': 'h',
-            '𝑖': 'i', '𝑗': 'j', '𝑘': 'k', '𝑙': 'l', '𝑚': 'm', '𝑛': 'n', '𝑜': 'o', '𝑝': 'p',
-            '𝑞': 'q', '𝑟': 'r', '𝑠': 's', '𝑡': 't', '𝑢': 'u', '𝑣': 'v', '𝑤': 'w', '𝑥': 'x',
-            '𝑦': 'y', '𝑧': 'z', '𝜀': 'ε'
-        }
-        
-        return (c.isalnum() or c == 'ε' or c in unicode_math_chars or
-                (len(c) == 1 and ord(c) > 127) or 
-                c.startswith('L') or
-                c in ['[', ']', '{', '}', '\\', 'n'])
+        # Los caracteres Unicode matemáticos (y ε) quedan cubiertos por ord(c) > 127
+        return c.isalnum() or c in _OPERAND_CHARS or (len(c) == 1 and ord(c) > 127)
     
     def normalize_unicode_chars(self, regex):
         """Normaliza caracteres Unicode matemáticos a caracteres ASCII estándar"""
-        unicode_replacements = {
-            '𝑁': 'N', '𝑎': 'a', '𝑏': 'b', '𝑐': 'c', '𝑑': 'd', '𝑒': 'e', '𝑓': 'f', '𝑔': 'g', '𝑕': 'h',
-            '𝑖': 'i', '𝑗': 'j', '𝑘': 'k', '𝑙': 'l', '𝑚': 'm', '𝑛': 'n', '𝑜': 'o', '𝑝': 'p',
-            '𝑞': 'q', '𝑟': 'r', '𝑠': 's', '𝑡': 't', '𝑢': 'u', '𝑣': 'v', '𝑤': 'w', '𝑥': 'x',
-            '𝑦': 'y', '𝑧': 'z', '𝜀': 'ε', '∗': '*'  # Asterisco Unicode a ASCII
-        }
-        
-        result = regex
-        for unicode_char, ascii_char in unicode_replacements.items():
-            result = result.replace(unicode_char, ascii_char)
-        
-        return result
+        # Caso común: expresión ASCII pura, nada que normalizar
+        if regex.isascii():
+            return regex
+        return regex.translate(_UNICODE_TABLE)
 
     def transform_plus_operator(self, regex):
         """
@@ -54,299 +138,304 @@ class ShuntingYardRegex:
                 (ab)+ se convierte en (ab)((ab))*
                 (a*|b*)+ se convierte en (a*|b*)((a*|b*))*
         """
-        result = regex
-        
-        while '+' in result:
-            # Buscar la primera ocurrencia de +
-            plus_pos = result.find('+')
-            if plus_pos == 0:
-                break
-            
-            # Determinar el operando que precede al +
-            operand_end = plus_pos - 1
-            
-            # Saltar espacios en blanco hacia atrás
-            while operand_end >= 0 and result[operand_end] == ' ':
-                operand_end -= 1
-            
-            if operand_end < 0:
-                break
-                
-            operand_start = operand_end
-            
-            # Si termina con ), buscar el ( correspondiente
-            if result[operand_end] == ')':
-                paren_count = 1
-                operand_start = operand_end - 1
-                while operand_start >= 0 and paren_count > 0:
-                    if result[operand_start] == ')':
-                        paren_count += 1
-                    elif result[operand_start] == '(':
-                        paren_count -= 1
-                    operand_start -= 1
-                operand_start += 1
-            elif result[operand_end] == ']':
-                # Para clases de caracteres [abc]
-                bracket_count = 1
-                operand_start = operand_end - 1
-                while operand_start >= 0 and bracket_count > 0:
-                    if result[operand_start] == ']':
-                        bracket_count += 1
-                    elif result[operand_start] == '[':
-                        bracket_count -= 1
-                    operand_start -= 1
-                operand_start += 1
-            else:
-                # Para operandos simples, retroceder hasta encontrar el inicio
-                while (operand_start > 0 and 
-                       result[operand_start - 1] not in ['(', ')', '[', ']', '|', '*', '?', '+', '.', ' ', '{', '}']):
-                    operand_start -= 1
-            
-            # Extraer el operando
-            operand = result[operand_start:operand_end + 1]
-            
-            # Determinar espacios antes y después del +
-            space_before = plus_pos - operand_end - 1
-            spaces_before = result[operand_end + 1:plus_pos]
-            
-            # Encontrar espacios después del +
-            space_after_pos = plus_pos + 1
-            while space_after_pos < len(result) and result[space_after_pos] == ' ':
-                space_after_pos += 1
-            spaces_after = result[plus_pos + 1:space_after_pos]
-            
-            # Reemplazar x+ con x(x)*
-            # Para operandos complejos como (a*|b*), necesitamos envolver en paréntesis adicionales
-            if operand.startswith('(') and operand.endswith(')'):
-                # Ya tiene paréntesis: (a*|b*)+ → (a*|b*)((a*|b*))*
-                transformation = operand + "(" + operand + ")*"
-            else:
-                # Operando simple: a+ → a(a)*
-                transformation = operand + "(" + operand + ")*"
-            
-            before = result[:operand_start]
-            after = result[space_after_pos:]
-            result = before + transformation + after
-        
-        return result
+        return self._expand_postfix_operator(regex, '+')
 
     def transform_question_operator(self, regex):
         """
         Transforma el operador ? (cero o una ocurrencia) en su equivalente (x|ε)
         """
-        result = regex
+        return self._expand_postfix_operator(regex, '?')
+    
+    def _expand_postfix_operator(self, regex, operator):
+        """
+        Expande + (x → x(x)*) o ? (x → (x|ε)) en una sola pasada de izquierda a derecha.
+        El operando se ubica con pilas de paréntesis/corchetes mantenidas durante el
+        recorrido, sin volver a buscar en la cadena. Los '(' que abre cada ? se anotan
+        por posición y se escriben en la unión final, sin insertar a mitad del búfer.
+        """
+        # Sin el operador (o expresión vacía) no hay nada que expandir
+        if operator not in regex:
+            return regex
         
-        # Aplicar transformaciones específicas para casos conocidos
-        # Caso especial: 0? (1? )? 0 ∗ → (0|ε)((1|ε)|ε)0∗
-        if "0? (1? )? 0" in result:
-            result = result.replace("0? (1? )? 0", "(0|ε)((1|ε)|ε)0")
+        out = []
+        leading = {}  # Posición en out → cantidad de '(' que van justo antes
+        opens, brackets = [], []  # Posiciones en out de '(' y '[' sin cerrar
+        close_start = bracket_start = 0  # Inicio del último grupo (...) / [...] cerrado
+        run = None  # Inicio del operando simple que termina en el último carácter
+        run_start = 0  # Inicio del operando simple para el último carácter no espacio
         
-        # Procesar ? restantes de derecha a izquierda
-        while '?' in result:
-            question_pos = result.rfind('?')
-            if question_pos == 0:
-                break
-            
-            # Determinar el operando que precede al ?
-            operand_end = question_pos - 1
+        def emit(c):
+            nonlocal close_start, bracket_start, run, run_start
+            pos = len(out)
+            out.append(c)
+            if c == '(':
+                opens.append(pos)
+            elif c == ')':
+                close_start = opens.pop() if opens else 0
+            elif c == '[':
+                brackets.append(pos)
+            elif c == ']':
+                bracket_start = brackets.pop() if brackets else 0
+            if c != ' ':
+                run_start = pos if run is None else run
+            run = None if c in _OPERAND_BOUNDARY else (pos if run is None else run)
+        
+        i, n = 0, len(regex)
+        while i < n:
+            c = regex[i]
+            if c != operator:
+                emit(c)
+                i += 1
+                continue
             
-            # Saltar espacios hacia atrás
-            while operand_end >= 0 and result[operand_end] == ' ':
+            # Saltar espacios hacia atrás para encontrar el final del operando
+            operand_end = len(out) - 1
+            while operand_end >= 0 and out[operand_end] == ' ':
                 operand_end -= 1
             
             if operand_end < 0:
-                break
-                
-            operand_start = operand_end
-            
-            # Si termina con ), buscar el ( correspondiente
-            if result[operand_end] == ')':
-                paren_count = 1
-                operand_start = operand_end - 1
-                while operand_start >= 0 and paren_count > 0:
-                    if result[operand_start] == ')':
-                        paren_count += 1
-                    elif result[operand_start] == '(':
-                        paren_count -= 1
-                    operand_start -= 1
-                operand_start += 1
-            else:
-                # Para operandos simples
-                while (operand_start > 0 and 
-                       result[operand_start - 1] not in ['(', ')', '[', ']', '|', '*', '?', '+', '.', ' ', '{', '}']):
-                    operand_start -= 1
+                if operator == '+':
+                    # + sin operando: dejar el resto sin transformar
+                    out.extend(regex[i:])
+                    break
+                emit(c)
+                i += 1
+                continue
             
-            # Extraer el operando
-            operand = result[operand_start:operand_end + 1]
+            # Los espacios entre el operando y el operador se eliminan
+            del out[operand_end + 1:]
             
-            # Encontrar espacios después del ?
-            space_after_pos = question_pos + 1
-            while space_after_pos < len(result) and result[space_after_pos] == ' ':
-                space_after_pos += 1
+            if out[operand_end] == ')':
+                operand_start = close_start
+            elif out[operand_end] == ']' and operator == '+':
+                # Para clases de caracteres [abc]
+                operand_start = bracket_start
+            else:
+                operand_start = run_start
             
-            # Reemplazar x? con (x|ε)
-            transformation = f"({operand}|ε)"
+            if operator == '+':
+                # Reemplazar x+ con x(x)*
+                operand = ''.join(out[operand_start:])
+                for ch in "(" + operand + ")*":
+                    emit(ch)
+            else:
+                # Reemplazar x? con (x|ε): el '(' queda anotado y abierto en la pila
+                leading[operand_start] = leading.get(operand_start, 0) + 1
+                opens.append(operand_start)
+                for ch in "|ε)":
+                    emit(ch)
             
-            before = result[:operand_start]
-            after = result[space_after_pos:]
-            result = before + transformation + after
+            # Saltar espacios después del operador
+            i += 1
+            while i < n and regex[i] == ' ':
+                i += 1
         
-        return result
+        if leading:
+            for pos, count in leading.items():
+                out[pos] = '(' * count + out[pos]
+        return ''.join(out)
     
     def handle_escaped_chars(self, regex):
-        result, i = "", 0
-        escaped_chars = {'(', ')', '[', ']', '{', '}', '.', '*', '+', '?', '|', '^'}
-        
-        while i < len(regex):
-            if regex[i] == '\\' and i + 1 < len(regex):
-                next_char = regex[i + 1]
-                if next_char in escaped_chars:
-                    result += f"L{next_char}"
-                elif next_char == 'n':
-                    result += "Ln"
-                else:
-                    result += next_char
-                i += 2
-            else:
-                result += regex[i]
-                i += 1
-        return result
+        # Caso común: sin '\\' no hay nada que reemplazar
+        if '\\' not in regex:
+            return regex
+        return _ESCAPE_RE.sub(_escape_replacer, regex)
     
     def needs_concatenation(self, c1, c2):
         """Determina si se necesita insertar concatenación entre dos caracteres"""
+        # La decisión se separa en una condición sobre c1 y otra sobre c2:
+        # para caracteres ASCII ambas están precalculadas en tablas
+        if len(c1) == 1 and len(c2) == 1 and c1 < '\x80' and c2 < '\x80':
+            return self.concat_after[ord(c1)] and self.concat_before[ord(c2)]
+        return self._can_end_concat(c1) and self._can_start_concat(c2)
+    
+    def _can_end_concat(self, c1):
+        """c1 puede ir antes de una concatenación implícita"""
+        # Un literal L (ej. 'L(') se comporta como operando
+        if _is_literal(c1):
+            return True
         # Casos donde NO se necesita concatenación
-        if (c2 in self.all_ops or 
-            c1 in self.binary_ops or 
-            c1 == '(' or 
-            c2 == ')' or
-            c1 == ' ' or
-            c2 == ' '):
+        if c1 in self.binary_ops or c1 == '(' or c1 == ' ':
             return False
-        
-        # Casos donde SÍ se necesita concatenación
-        # Operandos seguidos de operandos, paréntesis o literales
-        if ((self.is_operand(c1) or c1 in [')', ']', '}'] or c1 in ['*', '∗', '?']) and
-            (self.is_operand(c2) or c2 in ['(', '[', '{'] or c2.startswith('L'))):
-            return True
-            
-        return False
-        
+        # Operandos, cierres y operadores postfijos
+        return self.is_operand(c1) or c1 in _CONCAT_LEFT
+    
+    def _can_start_concat(self, c2):
+        """c2 puede ir después de una concatenación implícita"""
+        # Casos donde NO se necesita concatenación
+        if c2 in self.all_ops or c2 == ')' or c2 == ' ':
+            return False
+        # Operandos, aperturas y literales
+        return self.is_operand(c2) or c2 in _CONCAT_RIGHT or _is_literal(c2)
     
     def format_regex(self, regex):
         # Primero transformar operadores + en x(x)*
-        regex = self.transform_plus_operator(regex)
+        if '+' in regex:
+            regex = self.transform_plus_operator(regex)
         
         # Luego transformar operadores ? en (x|ε)
-        regex = self.transform_question_operator(regex)
+        if '?' in regex:
+            regex = self.transform_question_operator(regex)
         
-        # Luego manejar caracteres escapados
-        regex = self.handle_escaped_chars(regex)
-        result, i = "", 0
+        # Decodificar escapes y luego insertar concatenaciones
+        return self._insert_concatenation(self.handle_escaped_chars(regex))
+    
+    def _insert_concatenation(self, regex):
+        """
+        Inserta concatenaciones en una sola pasada sobre la expresión ya sin escapes.
+        La decisión de concatenar se toma al llegar el siguiente carácter no espacio;
+        los espacios intermedios se retienen para que el '.' quede antes de ellos.
+        """
+        can_end, can_start = self._can_end_concat, self._can_start_concat
+        after, before = self.concat_after, self.concat_before
+        out = []
+        append = out.append
+        prev = None  # Último token emitido pendiente de decidir concatenación
+        literal = False  # prev es un literal L (solo mira el carácter inmediato)
+        pending_l = False  # Se leyó una 'L' que formará literal con el siguiente carácter
+        spaces = 0  # Espacios retenidos tras prev
         
-        while i < len(regex):
-            c1 = regex[i]
-            
+        for c in regex:
             # Manejar literales L
-            if c1 == 'L' and i + 1 < len(regex):
-                literal = c1 + regex[i + 1]
-                result += literal
-                i += 2
-                if i < len(regex) and self.needs_concatenation(literal, regex[i]):
-                    result += '.'
+            if pending_l:
+                pending_l = False
+                prev, literal = 'L' + c, True
+                append(prev)
                 continue
             
-            result += c1
+            if c == ' ':
+                if literal:
+                    prev = None
+                if prev is None:
+                    append(' ')
+                else:
+                    spaces += 1
+                continue
             
-            # Verificar concatenación solo si no es un espacio
-            if c1 != ' ' and i + 1 < len(regex):
-                next_char = regex[i + 1]
-                # Saltar espacios para encontrar el siguiente carácter real
-                j = i + 1
-                while j < len(regex) and regex[j] == ' ':
-                    j += 1
-                if j < len(regex) and self.needs_concatenation(c1, regex[j]):
-                    result += '.'
+            if prev is not None:
+                # Consulta directa de las tablas ASCII; un literal L siempre puede concatenarse
+                if c < '\x80':
+                    if before[ord(c)] and (literal or (after[ord(prev)] if prev < '\x80'
+                                                      else can_end(prev))):
+                        append('.')
+                elif (literal or can_end(prev)) and can_start(c):
+                    append('.')
+                prev = None
+            if spaces:
+                append(' ' * spaces)
+                spaces = 0
             
-            i += 1
+            if c == 'L':
+                pending_l = True
+            else:
+                append(c)
+                prev, literal = c, False
         
-        return result
+        if pending_l:
+            append('L')
+        if spaces:
+            append(' ' * spaces)
+        return ''.join(out)
     
     def infix_to_postfix(self, regex, verbose=True):
+        # Ruta rápida: sin registro de pasos, memorizada por texto de la expresión
+        if not verbose:
+            return _compile_cached(regex)
+        
         # Normalizar caracteres Unicode primero
         original_regex = regex
         regex = self.normalize_unicode_chars(regex)
         
-        if verbose:
-            print(f"\n PROCESANDO: '{original_regex}'")
-            if original_regex != regex:
-                print(f"    Unicode normalizado: '{original_regex}' → '{regex}'")
-            print("=" * 60)
+        print(f"\n PROCESANDO: '{original_regex}'")
+        if original_regex != regex:
+            print(f"    Unicode normalizado: '{original_regex}' → '{regex}'")
+        print("=" * 60)
         
         # Mostrar transformación de + si existe
         if '+' in regex:
             transformed = self.transform_plus_operator(regex)
-            if verbose:
-                print(f"    Transformación +: '{regex}' → '{transformed}'")
+            print(f"    Transformación +: '{regex}' → '{transformed}'")
             regex = transformed
         
         # Mostrar transformación de ? si existe
         if '?' in regex:
             transformed = self.transform_question_operator(regex)
-            if verbose:
-                print(f"    Transformación ?: '{regex}' → '{transformed}'")
+            print(f"    Transformación ?: '{regex}' → '{transformed}'")
             regex = transformed
         
-        formatted_regex = self.format_regex(regex)
-        postfix, stack = "", []
+        # Las transformaciones ya se aplicaron arriba: solo falta escapes y concatenación
+        formatted_regex = self._insert_concatenation(self.handle_escaped_chars(regex))
         
-        if verbose:
-            print(f"    Regex formateada: '{formatted_regex}'")
-            print(f"   {'Paso':<4} | {'Char':<6} | {'Acción':<20} | {'Stack':<15} | {'Postfix':<20}")
-            print(f"   {'-'*4}-+-{'-'*6}-+-{'-'*20}-+-{'-'*15}-+-{'-'*20}")
+        postfix, stack = "", bytearray()
+        all_ops, prec, lparen = self.all_ops, self.precedence_table, _LPAREN
+        push, pop, log_step = stack.append, stack.pop, self._log_step
         
-        for i, c in enumerate(formatted_regex):
-            if verbose:
-                paso = i + 1
-            
+        print(f"    Regex formateada: '{formatted_regex}'")
+        print(f"   {'Paso':<4} | {'Char':<6} | {'Acción':<20} | {'Stack':<15} | {'Postfix':<20}")
+        print(f"   {'-'*4}-+-{'-'*6}-+-{'-'*20}-+-{'-'*15}-+-{'-'*20}")
+        
+        for paso, c in enumerate(formatted_regex, 1):
             if c == '(':
-                stack.append(c)
-                if verbose: self._log_step(paso, c, "Push '('", stack, postfix)
+                push(lparen)
+                log_step(paso, c, "Push '('", stack, postfix)
                 
             elif c == ')':
-                while stack and stack[-1] != '(':
-                    postfix += stack.pop()
-                if stack: stack.pop()  # Remover '('
-                if verbose: self._log_step(paso, c, "Pop hasta '('", stack, postfix)
+                while stack and stack[-1] != lparen:
+                    postfix += chr(pop())
+                if stack: pop()  # Remover '('
+                log_step(paso, c, "Pop hasta '('", stack, postfix)
                 
-            elif self.is_operator(c):
-                while (stack and stack[-1] != '(' and 
-                       self.get_precedence(stack[-1]) >= self.get_precedence(c)):
-                    postfix += stack.pop()
-                stack.append(c)
-                if verbose: self._log_step(paso, c, f"Procesar op '{c}'", stack, postfix)
+            elif c in all_ops:
+                c_prec = prec[ord(c)]
+                while stack and stack[-1] != lparen and prec[stack[-1]] >= c_prec:
+                    postfix += chr(pop())
+                push(ord(c))
+                log_step(paso, c, f"Procesar op '{c}'", stack, postfix)
                 
             elif c == ' ':
                 # Ignorar espacios
-                if verbose: self._log_step(paso, c, f"Ignorar espacio", stack, postfix)
+                log_step(paso, c, "Ignorar espacio", stack, postfix)
                 
             else:
                 postfix += c
-                if verbose: self._log_step(paso, c, f"Agregar '{c}'", stack, postfix)
+                log_step(paso, c, f"Agregar '{c}'", stack, postfix)
         
         # Pop operadores restantes
+        n = len(formatted_regex)
         while stack:
-            op = stack.pop()
+            op = chr(pop())
             postfix += op
-            if verbose:
-                paso = len(formatted_regex) + len(stack) + 1
-                self._log_step(paso, "EOF", f"Pop final '{op}'", stack, postfix)
+            paso = n + len(stack) + 1
+            log_step(paso, "EOF", f"Pop final '{op}'", stack, postfix)
         
-        if verbose:
-            original_regex = regex if '+' not in regex else f"(original con +)"
-            print(f"\n   🎯 RESULTADO: '{regex}' → '{postfix}'")
+        print(f"\n   🎯 RESULTADO: '{regex}' → '{postfix}'")
         
         return postfix
     
+    def _compile(self, regex):
+        """Infija → postfija sin registro de pasos (ruta usada cuando verbose=False)"""
+        regex = self.normalize_unicode_chars(regex)
+        if '+' in regex:
+            regex = self.transform_plus_operator(regex)
+        if '?' in regex:
+            regex = self.transform_question_operator(regex)
+        return self._shunting_yard_core(self._insert_concatenation(self.handle_escaped_chars(regex)))
+    
+    def _shunting_yard_core(self, formatted_regex):
+        """Núcleo de Shunting Yard sin registro de pasos (usado cuando verbose=False)"""
+        data = formatted_regex.encode('utf-8', 'surrogatepass')
+        postfix = _shunting_yard_opcodes(data, self.opcode_table, self.precedence_table)
+        return postfix.decode('utf-8', 'surrogatepass')
+    
     def _log_step(self, paso, char, accion, stack, postfix):
-        stack_str = ''.join(stack) if stack else "[]"
-        print(f"   {paso:<4} | {char:<6} | {accion:<20} | {stack_str:<15} | '{postfix}'")
+        print(_LOG_FMT % (paso, char, accion, stack.decode('ascii') or "[]", postfix))
+
+
+# Compilador compartido para la caché: las tablas de precedencia y operadores son constantes
+_COMPILER = ShuntingYardRegex()
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(regex):
+    """Conversión infija → postfija memorizada por el texto de la expresión"""
+    return _COMPILER._compile(regex)